@@ -0,0 +1,148 @@
+"""Latency of the comments of a post with many comments, by schema
+
+Compares the comment query and the post page with the plain foreign key
+index on blog_comment.post_id and all comment columns loaded, against the
+(post, created_at, id) index and the columns the page shows:
+
+    python benchmarks/comment_pages.py --comments 10000
+
+The comments live in a throwaway test database, half of them on the
+measured post and the rest spread over other posts.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'blogicum'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+# Production-like: cached template loaders, no debug query log
+settings.DEBUG = False
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection, models, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (setup_test_environment,  # noqa: E402
+                               teardown_test_environment)
+from django.utils import timezone  # noqa: E402
+
+from blog.models import Category, Comment, Post  # noqa: E402
+from blog.utils import encode_cursor, keyset_filter  # noqa: E402
+
+COMMENT_INDEX = Comment._meta.indexes[0]
+# The implicit index of the post foreign key before the migration
+FOREIGN_KEY_INDEX = models.Index(fields=('post',),
+                                 name='blog_comment_post_id_idx')
+
+ORDERING = ('created_at', 'id')
+
+
+def seed(comments):
+    author = get_user_model().objects.create(username='author')
+    category = Category.objects.create(title='Категория', slug='category',
+                                       description='Описание')
+    now = timezone.now()
+    Post.objects.bulk_create(
+        Post(title=f'Публикация {number}', text='Текст публикации.',
+             pub_date=now - timedelta(days=1), author=author,
+             category=category, is_visible=True)
+        for number in range(10))
+    posts = list(Post.objects.order_by('id'))
+    post = posts[0]
+    Comment.objects.bulk_create(
+        (Comment(title='Комментарий', text='Текст комментария. ' * 10,
+                 author=author,
+                 post=post if number % 2 else posts[1 + number % 9])
+         for number in range(comments * 2)),
+        batch_size=1000)
+    # auto_now_add gives every row the same time, spread them out
+    with transaction.atomic():
+        for number, pk in enumerate(Comment.objects.order_by('?')
+                                    .values_list('pk', flat=True)):
+            Comment.objects.filter(pk=pk).update(
+                created_at=now - timedelta(seconds=number))
+    return post
+
+
+def set_schema(old):
+    with connection.schema_editor() as editor:
+        if old:
+            editor.remove_index(Comment, COMMENT_INDEX)
+            editor.add_index(Comment, FOREIGN_KEY_INDEX)
+        else:
+            editor.remove_index(Comment, FOREIGN_KEY_INDEX)
+            editor.add_index(Comment, COMMENT_INDEX)
+
+
+def comment_queryset(post, all_columns, after=None):
+    queryset = (Comment.objects.filter(post=post).select_related('author')
+                .order_by(*ORDERING))
+    if not all_columns:
+        queryset = queryset.only('id', 'post', 'text', 'created_at',
+                                 'author__username')
+    if after is not None:
+        queryset = queryset.filter(keyset_filter(
+            ORDERING, [after.created_at, after.id]))
+    return queryset[:settings.COMMENTS_PER_PAGE + 1]
+
+
+def median_ms(action, repeat):
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        action()
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        post = seed(args.comments)
+        middle = (Comment.objects.filter(post=post).order_by(*ORDERING)
+                  [args.comments // 2])
+        cursor = encode_cursor([middle.created_at, middle.id])
+        urls = {'first': f'/posts/{post.id}/',
+                'middle': f'/posts/{post.id}/comments/?after={cursor}'}
+        client = Client()
+
+        def page(url):
+            cache.clear()
+            assert client.get(url).status_code == 200
+
+        print(f'{"schema":<10}{"page":<10}{"all cols ms":>14}'
+              f'{"shown cols ms":>16}{"view ms":>10}')
+        for old in (True, False):
+            set_schema(old)
+            connection.cursor().execute('ANALYZE')
+            for name, after in (('first', None), ('middle', middle)):
+                print(comment_queryset(post, False, after).explain())
+                queries = [median_ms(lambda: list(comment_queryset(
+                    post, all_columns, after)), args.repeat)
+                    for all_columns in (True, False)]
+                view = median_ms(lambda: page(urls[name]), args.repeat)
+                print(f'{"old" if old else "new":<10}{name:<10}'
+                      f'{queries[0]:>14.2f}{queries[1]:>16.2f}{view:>10.2f}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
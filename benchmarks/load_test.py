@@ -0,0 +1,422 @@
+r"""Load test of the blog and pages routes on a dataset shaped like db.json
+
+Builds a throwaway test database scaled up from the shapes of db.json,
+then drives every route of blog/urls.py and pages/urls.py from
+concurrent clients:
+
+    python benchmarks/load_test.py --users 200 --posts 20000 \
+        --comments 50000 --concurrency 8 --duration 30
+
+Prints p50/p95/p99 latency, requests per second and queries per request
+for every route, and saves them to benchmarks/results/ under the current
+commit. The run is compared with the latest saved run of another commit
+with the same options, or with the file given by --compare.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'blogicum'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+# Production-like: cached template loaders, no debug query log
+settings.DEBUG = False
+# Queries per request are read from the Server-Timing header
+settings.PERFORMANCE_METRICS = True
+settings.PERFORMANCE_SAMPLE_RATE = 0
+settings.LOGGING_CONFIG = None
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.mixins import LoginRequiredMixin  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (setup_test_environment,  # noqa: E402
+                               teardown_test_environment)
+from django.urls import URLPattern, reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from blog import urls as blog_urls  # noqa: E402
+from blog.management.commands.recount_comments import (  # noqa: E402
+    recount_comments)
+from blog.models import (Category, Comment, Location, Post,  # noqa: E402
+                         SitemapEntry)
+from blog.search import rebuild_index  # noqa: E402
+from blog.sitemaps import rebuild_sitemap  # noqa: E402
+from pages import urls as pages_urls  # noqa: E402
+
+User = get_user_model()
+
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+BATCH_SIZE = 1000
+
+
+"""Dataset"""
+
+
+def load_shapes(path):
+    """Texts and published shares of the objects in db.json"""
+    objects = defaultdict(list)
+    for item in json.loads(Path(path).read_text(encoding='utf-8')):
+        objects[item['model']].append(item['fields'])
+
+    def share(model):
+        items = objects[model]
+        return sum(item['is_published'] for item in items) / len(items)
+
+    return {
+        'titles': [post['title'] for post in objects['blog.post']],
+        'texts': [post['text'] for post in objects['blog.post']],
+        'categories': [(category['title'], category['description'])
+                       for category in objects['blog.category']],
+        'locations': [location['name']
+                      for location in objects['blog.location']],
+        'published': {model: share(model) for model in
+                      ('blog.post', 'blog.category', 'blog.location')},
+    }
+
+
+def seed(shapes, rng, users, posts, categories, locations, comments):
+    """Fills the database with scaled up copies of the db.json objects"""
+    now = timezone.now()
+    published = shapes['published']
+    User.objects.bulk_create(
+        (User(username=f'user{number}') for number in range(users)),
+        batch_size=BATCH_SIZE)
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    Category.objects.bulk_create((
+        Category(title=f'{title} {number}', description=description,
+                 slug=f'category-{number}',
+                 is_published=rng.random() < published['blog.category'])
+        for number, (title, description) in enumerate(
+            rng.choice(shapes['categories']) for _ in range(categories))
+    ), batch_size=BATCH_SIZE)
+    category_published = dict(Category.objects.values_list(
+        'pk', 'is_published'))
+    Location.objects.bulk_create((
+        Location(name=rng.choice(shapes['locations']),
+                 is_published=rng.random() < published['blog.location'])
+        for _ in range(locations)), batch_size=BATCH_SIZE)
+    location_ids = list(Location.objects.values_list('pk', flat=True))
+
+    def post(number):
+        # Every hundredth post is deferred by up to a week
+        if number % 100 == 99:
+            pub_date = now + timedelta(minutes=rng.randint(1, 60 * 24 * 7))
+        else:
+            pub_date = now - timedelta(minutes=rng.randint(1, 60 * 24 * 365))
+        category_id = rng.choice(list(category_published))
+        is_published = rng.random() < published['blog.post']
+        return Post(
+            title=rng.choice(shapes['titles']),
+            text=' '.join(rng.choices(shapes['texts'], k=rng.randint(1, 4))),
+            pub_date=pub_date, author_id=rng.choice(user_ids),
+            category_id=category_id, is_published=is_published,
+            location_id=rng.choice(location_ids + [None]),
+            is_visible=(is_published and category_published[category_id]
+                        and pub_date <= now))
+
+    Post.objects.bulk_create((post(number) for number in range(posts)),
+                             batch_size=BATCH_SIZE)
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create((
+        Comment(title='Комментарий', text=rng.choice(shapes['texts']),
+                author_id=rng.choice(user_ids),
+                post_id=rng.choice(post_ids))
+        for _ in range(comments)), batch_size=BATCH_SIZE)
+    recount_comments()
+    rebuild_index()
+    rebuild_sitemap()
+
+
+"""Routes"""
+
+
+def sample_pool():
+    """Objects the route arguments are drawn from"""
+    author = User.objects.filter(posts__is_visible=True).first()
+    own_posts = list(Post.objects.filter(author=author)
+                     .values_list('pk', flat=True)[:100])
+    own_post = own_posts[0]
+    own_comment = Comment.objects.create(
+        title='Комментарий', text='Свой комментарий', author=author,
+        post_id=own_post)
+    return {
+        'author': author,
+        'post_id': list(Post.published_ordered_obj
+                        .values_list('pk', flat=True)[:1000]),
+        'own_post_id': own_posts,
+        'own_comment': (own_post, own_comment.pk),
+        'username': list(User.objects.filter(posts__is_visible=True)
+                         .values_list('username', flat=True)
+                         .distinct()[:1000]),
+        'category_slug': list(Category.objects.filter(is_published=True)
+                              .values_list('slug', flat=True)),
+        'sitemap_file': list(SitemapEntry.objects.values_list(
+            'section', 'shard').distinct()),
+        'query': [word for title in Post.objects.values_list(
+            'title', flat=True)[:200] for word in title.split()
+            if len(word) > 3],
+    }
+
+
+# URL arguments build_url() knows how to fill
+ROUTE_ARGUMENTS = {'post_id', 'comment_id', 'username', 'category_slug',
+                   'section', 'shard'}
+
+
+def routes():
+    """(namespaced name, argument names, needs login) of every GET route"""
+    for module in (blog_urls, pages_urls):
+        for pattern in module.urlpatterns:
+            if not isinstance(pattern, URLPattern):
+                continue
+            arguments = set(pattern.pattern.converters)
+            if not arguments <= ROUTE_ARGUMENTS:
+                print(f'Skipped {module.app_name}:{pattern.name}, unknown '
+                      f'arguments {", ".join(arguments - ROUTE_ARGUMENTS)}')
+                continue
+            view_class = getattr(pattern.callback, 'view_class', None)
+            needs_login = view_class is not None and issubclass(
+                view_class, LoginRequiredMixin)
+            yield (f'{module.app_name}:{pattern.name}',
+                   tuple(pattern.pattern.converters), needs_login)
+
+
+def build_url(name, arguments, needs_login, pool, rng):
+    kwargs = {}
+    if 'comment_id' in arguments:
+        kwargs['post_id'], kwargs['comment_id'] = pool['own_comment']
+    elif 'post_id' in arguments:
+        kwargs['post_id'] = rng.choice(
+            pool['own_post_id'] if needs_login else pool['post_id'])
+    for argument in ('username', 'category_slug'):
+        if argument in arguments:
+            kwargs[argument] = rng.choice(pool[argument])
+    if 'shard' in arguments:
+        kwargs['section'], kwargs['shard'] = rng.choice(pool['sitemap_file'])
+    url = reverse(name, kwargs=kwargs)
+    if name == 'blog:search':
+        url += f'?q={rng.choice(pool["query"])}'
+    return url
+
+
+"""Load"""
+
+
+def queries_of(response):
+    """Number of SQL queries from the Server-Timing header"""
+    for metric in response.get('Server-Timing', '').split(','):
+        name, _, rest = metric.strip().partition(';')
+        if name == 'sql':
+            return int(rest.split('desc="')[1].split()[0])
+    return None
+
+
+class LoadResults:
+    """Samples and errors of every route, merged from the client threads"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def merge(self, samples, errors):
+        with self.lock:
+            for name, values in samples.items():
+                self.samples[name].extend(values)
+            for name, value in errors.items():
+                self.errors[name] += value
+
+
+def timed_get(client, url):
+    """Seconds, SQL queries and status of a GET read to the end"""
+    started = time.perf_counter()
+    response = client.get(url)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return (time.perf_counter() - started, queries_of(response),
+            response.status_code)
+
+
+def client_loop(route_list, pool, stop, rng, results):
+    anonymous = Client()
+    logged_in = Client()
+    logged_in.force_login(pool['author'])
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    while time.monotonic() < stop:
+        name, arguments, needs_login = rng.choice(route_list)
+        try:
+            elapsed, queries, status = timed_get(
+                logged_in if needs_login else anonymous,
+                build_url(name, arguments, needs_login, pool, rng))
+        except Exception:
+            # The test client raises the exceptions of the views, one of
+            # them must not end the run of the client
+            errors[name] += 1
+            continue
+        if status >= 400:
+            errors[name] += 1
+        samples[name].append((elapsed, queries))
+    connection.close()
+    results.merge(samples, errors)
+
+
+def run_load(route_list, pool, concurrency, duration, seed_value):
+    results = LoadResults()
+    stop = time.monotonic() + duration
+    threads = [threading.Thread(target=client_loop, args=(
+        route_list, pool, stop, random.Random(seed_value + number), results))
+        for number in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results.samples, results.errors, time.perf_counter() - started
+
+
+def percentile(values, share):
+    """None for a route without a single answered request"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def milliseconds(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def summarize(samples, errors, elapsed):
+    def stats(values, error_count):
+        latencies = [latency for latency, _ in values]
+        queries = [count for _, count in values if count is not None]
+        return {
+            'requests': len(values),
+            'errors': error_count,
+            'rps': round(len(values) / elapsed, 1),
+            'p50_ms': milliseconds(percentile(latencies, 0.50)),
+            'p95_ms': milliseconds(percentile(latencies, 0.95)),
+            'p99_ms': milliseconds(percentile(latencies, 0.99)),
+            'queries': (round(statistics.mean(queries), 2)
+                        if queries else None),
+        }
+
+    # Routes that only failed have errors and no samples
+    routes_stats = {name: stats(samples.get(name, []), errors.get(name, 0))
+                    for name in sorted(set(samples) | set(errors))}
+    everything = [value for values in samples.values() for value in values]
+    routes_stats['total'] = stats(everything, sum(errors.values()))
+    return routes_stats
+
+
+"""Results"""
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+            capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def previous_result(commit, config):
+    """Latest saved run of another commit with the same options"""
+    runs = sorted(RESULTS_DIR.glob('*.json'), reverse=True)
+    for path in runs:
+        result = json.loads(path.read_text(encoding='utf-8'))
+        if result['commit'] != commit and result.get('config') == config:
+            return path, result
+    return None, None
+
+
+def print_table(stats, baseline=None):
+    print(f'{"route":<24}{"req":>7}{"err":>5}{"rps":>8}{"p50 ms":>9}'
+          f'{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+          + (f'{"p95 vs base":>13}' if baseline else ''))
+    for name, row in stats.items():
+        line = (f'{name:<24}{row["requests"]:>7}{row["errors"]:>5}'
+                f'{row["rps"]:>8}{str(row["p50_ms"]):>9}'
+                f'{str(row["p95_ms"]):>9}{str(row["p99_ms"]):>9}'
+                f'{str(row["queries"]):>9}')
+        base = (baseline or {}).get(name)
+        if base and base['p95_ms'] and row['p95_ms'] is not None:
+            change = (row['p95_ms'] / base['p95_ms'] - 1) * 100
+            line += f'{change:>+12.1f}%'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixture', default=str(ROOT / 'db.json'))
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--categories', type=int, default=30)
+    parser.add_argument('--locations', type=int, default=60)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--compare', help='Saved result to compare with')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(load_shapes(args.fixture), rng, args.users, args.posts,
+             args.categories, args.locations, args.comments)
+        pool = sample_pool()
+        route_list = list(routes())
+        samples, errors, elapsed = run_load(
+            route_list, pool, args.concurrency, args.duration, args.seed)
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    commit = git_commit()
+    stats = summarize(samples, errors, elapsed)
+    config = {name: value for name, value in vars(args).items()
+              if name not in ('compare', 'no_save')}
+    if args.compare:
+        baseline_path = Path(args.compare)
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    else:
+        baseline_path, baseline = previous_result(commit, config)
+    if baseline:
+        print(f'Compared with {baseline_path.name} '
+              f'(commit {baseline["commit"]})')
+    print_table(stats, baseline and baseline['routes'])
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = RESULTS_DIR / f'{stamp}-{commit}.json'
+        path.write_text(json.dumps(
+            {'commit': commit, 'config': config, 'routes': stats},
+            ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f'Saved to {path.relative_to(ROOT)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Concurrent feed reads and comment writes on SQLite
+
+Compares the default SQLite settings with blogicum.database.SQLITE_PRAGMAS:
+
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 2
+
+Every reader runs the home feed query in a loop, every writer inserts
+comments and bumps the post counter in one transaction, the way
+CommentCreateView does.
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'blogicum'))
+
+from blogicum.database import SQLITE_PRAGMAS  # noqa: E402
+
+SCHEMA = '''
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY, title TEXT, text TEXT, pub_date TEXT,
+    is_published INTEGER, comment_count INTEGER DEFAULT 0);
+CREATE INDEX post_feed ON post (pub_date DESC) WHERE is_published;
+CREATE TABLE comment (
+    id INTEGER PRIMARY KEY, post_id INTEGER, text TEXT, created_at TEXT);
+'''
+
+FEED = ('SELECT id, title, text, pub_date, comment_count FROM post '
+        'WHERE is_published AND pub_date <= ? '
+        'ORDER BY pub_date DESC LIMIT 10')
+
+
+def connect(path, tuned):
+    # Same as a default Django connection: 5 seconds sqlite3 timeout
+    connection = sqlite3.connect(path, isolation_level=None,
+                                 check_same_thread=False)
+    if tuned:
+        for name, value in SQLITE_PRAGMAS.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+def prepare(path, posts):
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode = DELETE')
+    connection.executescript(SCHEMA)
+    connection.executemany(
+        'INSERT INTO post (title, text, pub_date, is_published) '
+        'VALUES (?, ?, ?, 1)',
+        ((f'title {i}', 'text ' * 50, f'2024-01-01 00:{i % 60:02}:{i % 60:02}')
+         for i in range(posts)))
+    connection.commit()
+    connection.close()
+
+
+class Counters:
+    """Numbers of reads, writes and lock errors shared by the threads"""
+
+    def __init__(self):
+        self.values = {'reads': 0, 'writes': 0, 'locked': 0}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.values[name] += 1
+
+    def rates(self, duration):
+        """Reads and writes per second, the total number of lock errors"""
+        return {name: value / duration if name != 'locked' else value
+                for name, value in self.values.items()}
+
+
+def reader(path, tuned, stop, counters):
+    connection = connect(path, tuned)
+    while time.monotonic() < stop:
+        try:
+            connection.execute(FEED, ('2030-01-01',)).fetchall()
+            counters.count('reads')
+        except sqlite3.OperationalError:
+            counters.count('locked')
+    connection.close()
+
+
+def write_comment(connection, post_id):
+    connection.execute('BEGIN IMMEDIATE')
+    connection.execute(
+        'INSERT INTO comment (post_id, text, created_at) '
+        "VALUES (?, 'comment', datetime('now'))", (post_id,))
+    connection.execute(
+        'UPDATE post SET comment_count = comment_count + 1 '
+        'WHERE id = ?', (post_id,))
+    connection.execute('COMMIT')
+
+
+def writer(path, tuned, stop, counters, number, posts):
+    connection = connect(path, tuned)
+    post_id = number
+    while time.monotonic() < stop:
+        post_id = post_id % posts + 1
+        try:
+            write_comment(connection, post_id)
+            counters.count('writes')
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            counters.count('locked')
+    connection.close()
+
+
+def start_threads(path, tuned, readers, writers, duration, posts, counters):
+    stop = time.monotonic() + duration
+    threads = [threading.Thread(target=reader,
+                                args=(path, tuned, stop, counters))
+               for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(path, tuned, stop,
+                                                      counters, number,
+                                                      posts))
+                for number in range(writers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def run(path, tuned, readers, writers, duration, posts):
+    counters = Counters()
+    for thread in start_threads(path, tuned, readers, writers, duration,
+                                posts, counters):
+        thread.join()
+    return counters.rates(duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--posts', type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f'{"settings":<10}{"reads/s":>12}{"writes/s":>12}{"locked":>10}')
+    for tuned in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'bench.sqlite3')
+            prepare(path, args.posts)
+            result = run(path, tuned, args.readers, args.writers,
+                         args.duration, args.posts)
+        print(f'{"tuned" if tuned else "default":<10}'
+              f'{result["reads"]:>12.0f}{result["writes"]:>12.0f}'
+              f'{result["locked"]:>10}')
+
+
+if __name__ == '__main__':
+    main()
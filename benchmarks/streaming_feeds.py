@@ -0,0 +1,110 @@
+"""Time to first byte and peak memory of streamed and rendered feed pages
+
+Renders the home page and a profile page with a large page size, the
+whole page at once and with STREAM_FEED_PAGES:
+
+    python benchmarks/streaming_feeds.py --posts 3000 --page-size 1000
+
+The posts live in a throwaway test database; the post card cache is
+cleared before every request, so every card is rendered.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'blogicum'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (setup_test_environment,  # noqa: E402
+                               teardown_test_environment)
+from django.utils import timezone  # noqa: E402
+
+from blog.models import Category, Post  # noqa: E402
+from blog.views import PostListView  # noqa: E402
+
+
+def seed(posts):
+    author = get_user_model().objects.create(username='author')
+    category = Category.objects.create(title='Категория', slug='category',
+                                       description='Описание')
+    now = timezone.now()
+    Post.objects.bulk_create(
+        Post(title=f'Публикация {number}', text='Текст публикации. ' * 40,
+             pub_date=now - timedelta(minutes=number), author=author,
+             category=category, is_visible=True)
+        for number in range(posts))
+    return author
+
+
+def measure(client, url, streaming):
+    """Seconds to the first byte, seconds to the last one, peak bytes"""
+    settings.STREAM_FEED_PAGES = streaming
+    cache.clear()
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(url)
+    if response.streaming:
+        chunks = iter(response.streaming_content)
+        size = len(next(chunks))
+        first_byte = time.perf_counter() - started
+        size += sum(len(chunk) for chunk in chunks)
+    else:
+        first_byte = time.perf_counter() - started
+        size = len(response.content)
+    finished = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert response.status_code == 200 and size
+    return first_byte, finished, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=3000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        author = seed(args.posts)
+        PostListView.paginate_by = args.page_size
+        settings.PAGINATION_PER_PAGE = args.page_size
+        # Authenticated requests bypass the anonymous page cache
+        client = Client()
+        client.force_login(author)
+        print(f'{"page":<10}{"mode":<10}{"TTFB ms":>10}{"total ms":>10}'
+              f'{"peak MiB":>10}')
+        for name, url in (('home', '/?page=1'),
+                          ('profile', f'/profile/{author.username}/')):
+            for streaming in (False, True):
+                runs = [measure(client, url, streaming)
+                        for _ in range(args.repeat)]
+                first_byte, finished, peak = (statistics.median(column)
+                                              for column in zip(*runs))
+                print(f'{name:<10}{"stream" if streaming else "render":<10}'
+                      f'{first_byte * 1000:>10.1f}{finished * 1000:>10.1f}'
+                      f'{peak / 2 ** 20:>10.1f}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
 from .models import Category, Comment, Location, Post
+from .search import search_posts
+from .utils import CachedCountPaginator
 
 
 admin.site.register(Category)
@@ -16,7 +18,9 @@ class PostAdmin(admin.ModelAdmin):
                     'author',
                     'location',
                     'category',
-                    'is_published')
+                    'comment_count',
+                    'is_published',
+                    'is_visible')
 
     list_editable = ('location',
                      'category',
@@ -29,6 +33,17 @@ class PostAdmin(admin.ModelAdmin):
 
     empty_value_display = 'Не задано'
 
+    paginator = CachedCountPaginator
+
+    # Skips the second, unfiltered COUNT(*) of the changelist
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Looks posts up in the full-text index instead of LIKE scans"""
+        if not search_term:
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
     def get_short_text(self, obj):
         return obj.text[:30]
     get_short_text.short_description = 'text'
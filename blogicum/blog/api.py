@@ -0,0 +1,246 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db.models import Case, F, Q, When
+from django.http import Http404, JsonResponse
+from django.views import View
+
+from .mixins import ConditionalGetMixin, RequestCacheMixin
+from .models import Category, Comment, Post
+from .utils import feed_validators, paginate_keyset
+
+
+"""Read-only JSON API
+
+Mirrors the feeds and the post page for clients that need no HTML. Rows
+are serialized straight from values() of the fields asked for with
+?fields=id,title,..., lists are paginated by ?after= and ?before= cursors.
+"""
+
+User = get_user_model()
+
+# API name of a field: lookup or expression it is selected with
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'category': 'category__slug',
+    'location': Case(When(location__is_published=True,
+                          then='location__name')),
+    'image': 'image',
+    'comment_count': 'comment_count',
+}
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created_at': 'created_at',
+    'author': 'author__username',
+}
+
+CATEGORY_FIELDS = ('title', 'description', 'slug')
+
+PROFILE_FIELDS = ('username', 'first_name', 'last_name', 'date_joined')
+
+# Keeps the selected API fields apart from the columns values() adds
+PREFIX = 'api_'
+
+
+class UnknownFields(ValueError):
+    """?fields= names a field the view does not have"""
+
+
+def select_fields(request, fields):
+    """The fields asked for with ?fields=, all of them by default"""
+    names = [name.strip()
+             for name in request.GET.get('fields', '').split(',')
+             if name.strip()]
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise UnknownFields(f'Неизвестные поля: {", ".join(unknown)}')
+    return {name: fields[name] for name in names} if names else fields
+
+
+def select_values(queryset, fields, *columns):
+    """values() queryset of the fields and of the extra columns"""
+    return queryset.values(*columns, **{
+        f'{PREFIX}{name}': F(lookup) if isinstance(lookup, str) else lookup
+        for name, lookup in fields.items()})
+
+
+def serialize(row):
+    """API representation of a row of select_values()"""
+    data = {key[len(PREFIX):]: value for key, value in row.items()
+            if key.startswith(PREFIX)}
+    if 'image' in data:
+        data['image'] = (default_storage.url(data['image'])
+                         if data['image'] else None)
+    return data
+
+
+def page_url(request, name, cursor):
+    """Link to the page before or after the cursor, keeping ?fields="""
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    for key in ('after', 'before'):
+        query.pop(key, None)
+    query[name] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def visible_posts(request):
+    """Posts the post page would show to the user"""
+    return Post.objects.filter(Q(is_visible=True)
+                               | Q(author_id=request.user.pk))
+
+
+class JsonView(View):
+    """Answers GET with get_data() serialized to JSON"""
+
+    def get_data(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        return self.render(self.get_data())
+
+    def render(self, data, status=200):
+        return JsonResponse(data, status=status,
+                            json_dumps_params={'ensure_ascii': False})
+
+
+class ApiView(RequestCacheMixin, ConditionalGetMixin, JsonView):
+    """Base of the API views, answers errors with JSON as well
+
+    ConditionalGetMixin.get() answers revalidations before get_data()
+    builds the body.
+    """
+
+    replica_reads = True
+    http_method_names = ['get', 'head', 'options']
+    fields = POST_FIELDS
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404 as error:
+            return self.render({'error': str(error) or 'Не найдено'},
+                               status=404)
+        except UnknownFields as error:
+            return self.render({'error': str(error)}, status=400)
+
+
+class ApiListView(ApiView):
+    """A cursor paginated list of rows, newest posts first"""
+
+    ordering = ('-pub_date', '-id')
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_validators(self):
+        return feed_validators(self.get_queryset())
+
+    def get_extra(self):
+        """Objects the list belongs to"""
+        return {}
+
+    def get_data(self):
+        rows = select_values(self.get_queryset(),
+                             select_fields(self.request, self.fields),
+                             *(field.lstrip('-') for field in self.ordering))
+        page = paginate_keyset(self.request, rows,
+                               settings.PAGINATION_PER_PAGE,
+                               ordering=self.ordering)
+        return {
+            **self.get_extra(),
+            'results': [serialize(row) for row in page],
+            'next': page_url(self.request, 'after', page.next_cursor),
+            'previous': page_url(self.request, 'before',
+                                 page.previous_cursor),
+        }
+
+
+class ApiPostListView(ApiListView):
+    """Published posts, as on the homepage"""
+
+    def get_queryset(self):
+        return Post.published_ordered_obj.all()
+
+
+class ApiCategoryPostsView(ApiListView):
+    """Published posts of a published category"""
+
+    def get_category(self):
+        return self.memoize('category', lambda: (
+            Category.objects.filter(is_published=True,
+                                    slug=self.kwargs['category_slug'])
+            .values(*CATEGORY_FIELDS).first()))
+
+    def get_queryset(self):
+        if self.get_category() is None:
+            raise Http404('Категория не найдена')
+        return Post.published_ordered_obj.filter(
+            category__slug=self.kwargs['category_slug'])
+
+    def get_extra(self):
+        return {'category': self.get_category()}
+
+
+class ApiProfileView(ApiListView):
+    """Posts of a user, including the hidden ones for the user itself"""
+
+    def get_profile(self):
+        return self.memoize('profile', lambda: (
+            User.objects.filter(username=self.kwargs['username'])
+            .values(*PROFILE_FIELDS).first()))
+
+    def get_queryset(self):
+        profile = self.get_profile()
+        if profile is None:
+            raise Http404('Пользователь не найден')
+        if self.request.user.get_username() == profile['username']:
+            posts = Post.objects.all()
+        else:
+            posts = Post.published_ordered_obj.all()
+        return posts.filter(author__username=profile['username'])
+
+    def get_extra(self):
+        return {'profile': self.get_profile()}
+
+
+class ApiPostDetailView(ApiView):
+    """A post, for its author also before it is published"""
+
+    def get_queryset(self):
+        return visible_posts(self.request).filter(pk=self.kwargs['post_id'])
+
+    def get_validators(self):
+        return feed_validators(self.get_queryset())
+
+    def get_data(self):
+        row = select_values(self.get_queryset(),
+                            select_fields(self.request, self.fields)).first()
+        if row is None:
+            raise Http404('Публикация не найдена')
+        return serialize(row)
+
+
+class ApiCommentListView(ApiListView):
+    """Comments of a post, the oldest first"""
+
+    fields = COMMENT_FIELDS
+    ordering = ('created_at', 'id')
+
+    def get_post(self):
+        return visible_posts(self.request).filter(pk=self.kwargs['post_id'])
+
+    def get_validators(self):
+        return feed_validators(self.get_post())
+
+    def get_queryset(self):
+        if not self.memoize('post', self.get_post().exists):
+            raise Http404('Публикация не найдена')
+        return Comment.objects.filter(post_id=self.kwargs['post_id'])
@@ -0,0 +1,112 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+from .models import Category, Location, Post, User
+
+
+"""Version stamps of cached fragments
+
+Every saved or deleted object gets a new stamp, so the fragments built
+from its old state are never looked up again and age out of the cache.
+"""
+
+
+def version_key(model, pk):
+    return f'blog:version:{model._meta.label_lower}:{pk}'
+
+
+def new_stamp():
+    return str(time.time_ns())
+
+
+def stamp_time(stamp):
+    """Moment the stamp was issued"""
+    return datetime.fromtimestamp(int(stamp) / 1e9, tz=timezone.utc)
+
+
+def bump_versions(*objects):
+    """Invalidates fragments of the given (model, pk) pairs"""
+    stamp = new_stamp()
+    cache.set_many({version_key(model, pk): stamp
+                    for model, pk in objects if pk is not None}, None)
+
+
+def get_versions(*objects):
+    """Returns stamps of the given (model, pk) pairs in one cache call"""
+    keys = [version_key(model, pk) for model, pk in objects
+            if pk is not None]
+    versions = cache.get_many(keys)
+    missing = {key: new_stamp() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[version_key(model, pk)] if pk is not None else '-'
+            for model, pk in objects]
+
+
+def post_card_stamp(post):
+    """Changes whenever anything shown on the post card changes"""
+    return '.'.join(get_versions((Post, post.pk),
+                                 (User, post.author_id),
+                                 (Category, post.category_id),
+                                 (Location, post.location_id)))
+
+
+"""Version stamps shared by whole groups of cached values"""
+
+# Cached pages
+PAGES_VERSION_KEY = 'blog:version:pages'
+# Cached numbers of posts, including the ones of search results
+COUNTS_VERSION_KEY = 'blog:version:counts'
+
+
+def bump_version(key):
+    """Invalidates every value cached under the version"""
+    cache.set(key, new_stamp(), None)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = new_stamp()
+        cache.add(key, version, None)
+    return version
+
+
+"""Version stamps of cached syndication feeds
+
+Every feed has its own stamp, bumped when a post enters, leaves or changes
+in it; the common one is bumped when a category or an author changes.
+"""
+
+FEEDS_VERSION_KEY = 'blog:version:feeds'
+
+
+def feed_version_key(stream):
+    return f'blog:version:feed:{stream}'
+
+
+def bump_feed_versions(*streams):
+    """Invalidates the cached feeds of the given streams"""
+    stamp = new_stamp()
+    cache.set_many({feed_version_key(stream): stamp for stream in streams},
+                   None)
+
+
+def get_feed_version(stream, check):
+    """Common and own stamps of the feed of the stream
+
+    check() is called before new stamps are issued, it raises if the
+    object of the stream does not exist, so no stamps are left behind for
+    made up category slugs and usernames.
+    """
+    keys = [FEEDS_VERSION_KEY, feed_version_key(stream)]
+    versions = cache.get_many(keys)
+    missing = {key: new_stamp() for key in keys if key not in versions}
+    if missing:
+        check()
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
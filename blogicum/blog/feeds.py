@@ -0,0 +1,172 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+
+from .caching import get_feed_version, stamp_time
+from .models import Category, Post
+
+
+"""RSS and Atom feeds
+
+The homepage, every category and every author have a feed of their
+latest published posts. A built feed is cached until a post of it
+changes, see feed_streams(), or PAGE_CACHE_TIMEOUT passes; polls with
+a matching If-None-Match or If-Modified-Since are answered from the
+version stamps alone.
+"""
+
+User = get_user_model()
+
+
+def feed_streams(posts):
+    """Streams whose feeds show the posts of the queryset"""
+    streams = set()
+    for slug, username in posts.values_list('category__slug',
+                                            'author__username'):
+        streams.update(('index', f'author:{username}'))
+        if slug is not None:
+            streams.add(f'category:{slug}')
+    return streams
+
+
+class CachedFeedMixin:
+    """Keeps the built feed in the cache under its version stamps"""
+
+    def get_stream(self, **kwargs):
+        raise NotImplementedError
+
+    def __call__(self, request, *args, **kwargs):
+        stream = self.get_stream(**kwargs)
+        versions = get_feed_version(
+            stream, lambda: self.get_object(request, *args, **kwargs))
+        etag = quote_etag(f'{type(self).__name__}:{".".join(versions)}')
+        timestamp = int(max(map(stamp_time, versions)).timestamp())
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=timestamp)
+        if response is not None:
+            return response
+        # Links in the feed are absolute, so they depend on the host
+        key = 'blog:feed:{}:{}'.format(
+            etag, hashlib.md5(request.get_host().encode()).hexdigest())
+        response = cache.get(key)
+        if response is None:
+            response = super().__call__(request, *args, **kwargs)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(timestamp)
+            cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+
+class PostsFeed(CachedFeedMixin, Feed):
+    """Latest published posts of the homepage"""
+
+    title = 'Блогикум'
+    description = 'Новые публикации Блогикума'
+
+    def get_stream(self, **kwargs):
+        return 'index'
+
+    def link(self):
+        return reverse('blog:index')
+
+    def get_posts(self, obj):
+        return Post.published_ordered_obj.all()
+
+    def items(self, obj):
+        return (self.get_posts(obj).select_related('author', 'category')
+                [:settings.FEED_POSTS])
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('blog:post_detail', args=[post.id])
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.get_username()
+
+    def item_author_link(self, post):
+        return reverse('blog:profile', args=[post.author.get_username()])
+
+    def item_categories(self, post):
+        if post.category is None:
+            return ()
+        return (post.category.title,)
+
+
+class CategoryFeed(PostsFeed):
+    """Latest published posts of a published category"""
+
+    def get_stream(self, category_slug):
+        return f'category:{category_slug}'
+
+    def get_object(self, request, category_slug):
+        return get_object_or_404(Category, slug=category_slug,
+                                 is_published=True)
+
+    def title(self, category):
+        return f'Блогикум: {category.title}'
+
+    def description(self, category):
+        return category.description
+
+    def link(self, category):
+        return reverse('blog:category_posts', args=[category.slug])
+
+    def get_posts(self, category):
+        return Post.published_ordered_obj.filter(category=category)
+
+
+class AuthorFeed(PostsFeed):
+    """Latest published posts of an author"""
+
+    def get_stream(self, username):
+        return f'author:{username}'
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Блогикум: {author.get_username()}'
+
+    def description(self, author):
+        return f'Публикации пользователя {author.get_username()}'
+
+    def link(self, author):
+        return reverse('blog:profile', args=[author.get_username()])
+
+    def get_posts(self, author):
+        return Post.published_ordered_obj.filter(author=author)
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class AtomPostsFeed(AtomFeedMixin, PostsFeed):
+    pass
+
+
+class AtomCategoryFeed(AtomFeedMixin, CategoryFeed):
+    pass
+
+
+class AtomAuthorFeed(AtomFeedMixin, AuthorFeed):
+    pass
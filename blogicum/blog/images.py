@@ -0,0 +1,111 @@
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from jobs.queue import enqueue
+
+from .caching import PAGES_VERSION_KEY, bump_version, bump_versions
+from .models import Post
+
+
+"""Resized variants of Post.image
+
+Every upload is resized to settings.IMAGE_VARIANT_WIDTHS, each width saved
+as WebP and as a JPEG fallback next to the original, in a variants/
+subdirectory. Post.image_variants records the widths built and the image
+they were built from, so variants of a replaced image are never shown.
+"""
+
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True,
+            'progressive': True},
+}
+
+
+def variant_name(source, width, extension):
+    directory, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants',
+                          f'{stem}-{width}w.{extension}')
+
+
+def variant_widths(original_width):
+    """Widths worth building: never upscaled, at least one"""
+    widths = [width for width in settings.IMAGE_VARIANT_WIDTHS
+              if width < original_width]
+    return widths or [original_width]
+
+
+def has_variants(post):
+    return bool(post.image) and (
+        post.image_variants.get('source') == post.image.name)
+
+
+def variant_url(post, width, extension):
+    return default_storage.url(variant_name(post.image.name, width,
+                                            extension))
+
+
+def srcset(post, extension):
+    return ', '.join(f'{variant_url(post, width, extension)} {width}w'
+                     for width in post.image_variants['widths'])
+
+
+def render_variant(image, width, extension):
+    height = max(round(image.height * width / image.width), 1)
+    resized = image.resize((width, height), Image.LANCZOS)
+    if extension == 'jpg' and resized.mode != 'RGB':
+        resized = resized.convert('RGB')
+    buffer = BytesIO()
+    resized.save(buffer, **VARIANT_FORMATS[extension])
+    return buffer.getvalue()
+
+
+def delete_variants(variants):
+    for width in variants.get('widths', ()):
+        for extension in VARIANT_FORMATS:
+            default_storage.delete(
+                variant_name(variants['source'], width, extension))
+
+
+def build_variants(post_id, force=False):
+    """Writes the variants of a post image and records them on the post"""
+    post = Post.objects.only('image', 'image_variants').filter(
+        pk=post_id).first()
+    if post is None or not post.image or (
+            has_variants(post) and not force):
+        return False
+    source = post.image.name
+    with post.image.open('rb'), Image.open(post.image) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands()
+                                  else 'RGB')
+        widths = variant_widths(image.width)
+        for width in widths:
+            for extension in VARIANT_FORMATS:
+                name = variant_name(source, width, extension)
+                default_storage.delete(name)
+                default_storage.save(name, ContentFile(
+                    render_variant(image, width, extension)))
+    variants = {'source': source, 'widths': widths}
+    # The image may have been replaced while the variants were rendered.
+    if not Post.objects.filter(pk=post_id, image=source).update(
+            image_variants=variants):
+        delete_variants(variants)
+        return False
+    if post.image_variants.get('source') not in (None, source):
+        delete_variants(post.image_variants)
+    bump_versions((Post, post_id))
+    bump_version(PAGES_VERSION_KEY)
+    return True
+
+
+def schedule_variants(post_id):
+    """Queues the variants to be built by the background worker"""
+    enqueue('blog.images.build_variants', post_id)
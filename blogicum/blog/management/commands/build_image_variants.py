@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import build_variants
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Builds the resized copies of post images that are missing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild the copies that already exist')
+
+    def handle(self, *args, **options):
+        post_ids = (Post.objects.exclude(image='').order_by('pk')
+                    .values_list('pk', flat=True))
+        built = 0
+        for post_id in post_ids.iterator():
+            try:
+                built += build_variants(post_id, force=options['force'])
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'Post {post_id}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Image copies built for {built} posts'))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from blog.models import Post
+from blog.utils import feed_queryset
+
+
+def feed_querysets():
+    """Querysets of the index, category and profile feeds"""
+    published = Post.published_ordered_obj.all()
+    return {
+        'index': feed_queryset(published),
+        'category': feed_queryset(published.filter(category=1)),
+        'profile': feed_queryset(published.filter(author=1)),
+        'own profile': feed_queryset(
+            Post.objects.filter(author=1).order_by('-pub_date')),
+    }
+
+
+def uses_index(plan):
+    """Tells whether blog_post is read through an index in the plan"""
+    if connection.vendor == 'postgresql':
+        return 'Seq Scan on blog_post' not in plan
+    post_lines = [line for line in plan.splitlines()
+                  if ' blog_post' in line]
+    return bool(post_lines) and all('USING' in line for line in post_lines)
+
+
+def explain_feeds():
+    """Returns the query plan of every feed"""
+    plans = {}
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Tiny tables are always seq scanned, ask if an index fits.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, queryset in feed_querysets().items():
+            plans[name] = queryset[:10].explain()
+    return plans
+
+
+class Command(BaseCommand):
+    help = 'Checks that the post feeds are served by index scans'
+
+    def handle(self, *args, **options):
+        failed = []
+        for name, plan in explain_feeds().items():
+            self.stdout.write(f'== {name}\n{plan}\n')
+            if not uses_index(plan):
+                failed.append(name)
+        if failed:
+            raise CommandError(
+                f'Feeds scan the whole blog_post table: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS('All feeds use index scans'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import SitemapEntry
+from blog.sitemaps import rebuild_sitemap
+
+
+class Command(BaseCommand):
+    help = 'Fills the sitemap with the URLs of posts, categories and profiles'
+
+    def handle(self, *args, **options):
+        rebuild_sitemap()
+        self.stdout.write(self.style.SUCCESS(
+            f'Sitemap rebuilt with {SitemapEntry.objects.count()} URLs'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.caching import PAGES_VERSION_KEY, bump_version, bump_versions
+from blog.models import Comment, Post
+
+BATCH_SIZE = 1000
+
+
+def recount_comments(queryset=None):
+    """Rewrites Post.comment_count from the comments table
+
+    update() sends no signals, so the cards and pages of the repaired
+    posts are invalidated here. Returns the number of repaired posts.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    comments = (Comment.objects.filter(post=OuterRef('pk'))
+                .order_by().values('post')
+                .annotate(total=Count('pk')).values('total'))
+    total = Coalesce(Subquery(comments, output_field=IntegerField()), 0)
+    drifted = list(queryset.annotate(total=total)
+                   .exclude(comment_count=F('total'))
+                   .values_list('pk', flat=True))
+    for start in range(0, len(drifted), BATCH_SIZE):
+        batch = drifted[start:start + BATCH_SIZE]
+        Post.objects.filter(pk__in=batch).update(comment_count=total)
+        bump_versions(*((Post, pk) for pk in batch))
+    if drifted:
+        bump_version(PAGES_VERSION_KEY)
+    return len(drifted)
+
+
+class Command(BaseCommand):
+    help = 'Recounts the stored number of comments of every post'
+
+    def handle(self, *args, **options):
+        updated = recount_comments()
+        self.stdout.write(self.style.SUCCESS(
+            f'Comment counters repaired for {updated} posts'))
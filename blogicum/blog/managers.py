@@ -1,11 +1,13 @@
 from django.db import models
-from django.utils import timezone
 
 
 class PublishedPostsManager(models.Manager):
-    """Returns all published posts"""
+    """Returns all published posts
+
+    Post.is_visible is kept up to date by blog/publication.py, so the
+    result does not depend on the time of the query.
+    """
+
     def get_queryset(self):
-        return super().get_queryset().filter(is_published=True,
-                                            category__is_published=True,
-                                            pub_date__lte=timezone.now()
+        return super().get_queryset().filter(is_visible=True
                                             ).order_by('-pub_date')
\ No newline at end of file
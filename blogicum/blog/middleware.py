@@ -0,0 +1,60 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import parse_http_date_safe
+
+from .caching import PAGES_VERSION_KEY, get_version
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:page:{get_version(PAGES_VERSION_KEY)}:{path}'
+
+
+class AnonymousPageCacheMiddleware(MiddlewareMixin):
+    """Serves public pages to anonymous visitors from the cache
+
+    Any change of posts, categories, locations, users or comments
+    invalidates all pages, and so does the publication of a deferred
+    post by blog/publication.py.
+    """
+
+    cached_views = (
+        'blog:index',
+        'blog:category_posts',
+        'blog:api_index',
+        'blog:api_category_posts',
+        'pages:about',
+        'pages:rules',
+    )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.resolver_match.view_name not in self.cached_views
+                or request.user.is_authenticated):
+            return None
+        request.page_cache_key = page_cache_key(request)
+        response = cache.get(request.page_cache_key)
+        if response is None:
+            return None
+        request.page_cache_hit = True
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')),
+            response=response)
+
+    def process_response(self, request, response):
+        key = getattr(request, 'page_cache_key', None)
+        if (key is None
+                or getattr(request, 'page_cache_hit', False)
+                or response.status_code != 200
+                or response.streaming
+                or response.cookies):
+            return response
+        cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+SQLITE_TABLE = '''
+    CREATE VIRTUAL TABLE blog_post_search USING fts5(
+        title, text, comments, tokenize = 'unicode61 remove_diacritics 2'
+    )
+'''
+
+POSTGRESQL_TABLE = '''
+    CREATE TABLE blog_post_search (
+        post_id bigint PRIMARY KEY
+            REFERENCES blog_post (id) ON DELETE CASCADE
+            DEFERRABLE INITIALLY DEFERRED,
+        document tsvector NOT NULL
+    );
+    CREATE INDEX blog_post_search_document_idx
+        ON blog_post_search USING GIN (document);
+'''
+
+
+def create_search_index(apps, schema_editor):
+    from blog.search import rebuild_index
+
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRESQL_TABLE)
+    else:
+        schema_editor.execute(SQLITE_TABLE)
+    rebuild_index(connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    schema_editor.execute('DROP TABLE blog_post_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
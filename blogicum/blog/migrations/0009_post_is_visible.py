@@ -0,0 +1,51 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:23
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_is_visible(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Post = apps.get_model('blog', 'Post')
+    now = timezone.now()
+    Post.objects.filter(is_published=True, category__is_published=True,
+                        pub_date__lte=now).update(is_visible=True)
+    deferred = (Post.objects.filter(is_published=True, pub_date__gt=now)
+                .values_list('pub_date', flat=True).distinct())
+    Job.objects.bulk_create(
+        Job(task='blog.publication.publish_due_posts', args=[],
+            run_at=pub_date)
+        for pub_date in deferred)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_image_variants'),
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_published_pub_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_category_pub_date_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, help_text='Опубликована, в опубликованной категории и её время публикации наступило.', verbose_name='Видна в лентах'),
+        ),
+        migrations.RunPython(fill_is_visible, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['-pub_date', '-id'], name='post_visible_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['category', '-pub_date'], name='post_category_visible_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:48
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_sitemap(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Category = apps.get_model('blog', 'Category')
+    if Category.objects.exists():
+        Job.objects.create(task='blog.sitemaps.rebuild_sitemap', args=[],
+                           run_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_comment_post_created_at'),
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(choices=[('posts', 'Публикации'), ('categories', 'Категории'), ('profiles', 'Профили')], max_length=16, verbose_name='Раздел')),
+                ('object_id', models.BigIntegerField(verbose_name='Идентификатор объекта')),
+                ('shard', models.PositiveIntegerField(verbose_name='Часть карты сайта')),
+                ('location', models.CharField(max_length=256, verbose_name='Адрес')),
+                ('lastmod', models.DateTimeField(verbose_name='Последнее изменение')),
+            ],
+            options={
+                'verbose_name': 'адрес карты сайта',
+                'verbose_name_plural': 'Карта сайта',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sitemapentry',
+            index=models.Index(fields=['section', 'shard', 'lastmod'], name='sitemap_entry_shard_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='sitemapentry',
+            constraint=models.UniqueConstraint(fields=('section', 'object_id'), name='sitemap_entry_object_uniq'),
+        ),
+        migrations.RunPython(schedule_sitemap, migrations.RunPython.noop),
+    ]
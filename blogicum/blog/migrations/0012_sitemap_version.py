@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-17 05:23
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_sitemap_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'версия карты сайта',
+                'verbose_name_plural': 'Версии карты сайта',
+            },
+        ),
+    ]
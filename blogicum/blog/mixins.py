@@ -1,11 +1,125 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.shortcuts import redirect
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import get_object_or_404, redirect
+from django.template.context import make_context
+from django.template.loader import get_template
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from .models import Comment, Post
+from .utils import page_window
 from .forms import CommentForm, PostForm
 
 
-class OnlyAuthorMixin(UserPassesTestMixin):
+class RequestCacheMixin:
+    """Loads every object of the view only once per request
+
+    A view instance serves a single request, so the results are kept
+    on the instance and repeated calls cost no queries.
+    """
+
+    def memoize(self, name, loader):
+        cache = self.__dict__.setdefault('_request_cache', {})
+        if name not in cache:
+            cache[name] = loader()
+        return cache[name]
+
+    def get_object(self, queryset=None):
+        get_object = super().get_object
+        return self.memoize('object', lambda: get_object(queryset))
+
+
+class ConditionalGetMixin:
+    """Answers If-None-Match and If-Modified-Since with 304
+
+    The validators are computed before the page is rendered, so a
+    revalidation costs only what get_validators() queries.
+    """
+
+    def get_validators(self):
+        """Returns the ETag source and the last modification datetime"""
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag_source, last_modified = self.get_validators()
+        # Pages differ for every logged in user, and their forms carry the
+        # CSRF token that is rotated on every login. get_token() sets the
+        # token up front, so the first response has the same ETag as the
+        # later ones
+        if request.user.is_authenticated:
+            get_token(request)
+            etag_source = (f'{etag_source}:{request.user.pk}:'
+                           f'{request.META["CSRF_COOKIE"]}')
+        etag = quote_etag(hashlib.md5(etag_source.encode()).hexdigest())
+        timestamp = int(min(last_modified, timezone.now()).timestamp())
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class StreamingFeedMixin:
+    """Sends a feed page card by card when settings.STREAM_FEED_PAGES is on
+
+    The page is rendered with a marker in place of the cards, see
+    includes/post_list.html. Everything before the marker, the header of
+    base.html included, is flushed first, then each card as soon as the
+    posts iterator yields it, then the paginator and the footer.
+    """
+
+    card_template = 'includes/post_article.html'
+
+    def render_to_response(self, context, **response_kwargs):
+        if not settings.STREAM_FEED_PAGES:
+            return super().render_to_response(context, **response_kwargs)
+        context['stream_marker'] = marker = f'stream-cards-{uuid4().hex}'
+        page = super().render_to_response(context, **response_kwargs)
+        head, tail = page.rendered_content.split(marker, 1)
+        posts = context['page_obj'].object_list
+        if isinstance(posts, QuerySet):
+            # The database router is consulted now, within the request.
+            posts = posts.using(posts.db).iterator()
+        return StreamingHttpResponse(
+            self.stream(head, posts, tail),
+            content_type=page['Content-Type'],
+            status=page.status_code)
+
+    def stream(self, head, posts, tail):
+        yield head
+        # One context for all the cards, so the templates they include
+        # are loaded once, as when the cards are rendered in a loop.
+        template = get_template(self.card_template).template
+        context = make_context({}, self.request)
+        with context.render_context.push_state(template), \
+                context.bind_template(template):
+            for post in posts:
+                with context.push(post=post):
+                    yield template._render(context)
+        yield tail
+
+
+class PageWindowMixin:
+    """Adds the page numbers for includes/paginator.html to the context"""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if page is not None and not getattr(page, 'is_cursor', False):
+            context['page_range'] = page_window(page)
+        return context
+
+
+class OnlyAuthorMixin(RequestCacheMixin, UserPassesTestMixin):
     """Only logged in users can edit/delete
     Without authentication redirect to blog:post_detail
     """
@@ -14,7 +128,7 @@ class OnlyAuthorMixin(UserPassesTestMixin):
 
     def test_func(self):
         object = self.get_object()
-        return object.author == self.request.user
+        return object.author_id == self.request.user.pk
 
     def handle_no_permission(self):
         return redirect('blog:post_detail', self.kwargs['post_id'])
@@ -37,11 +151,15 @@ class CreateDeletePostMixin:
                             kwargs={'username': self.request.user.username})
     
 
-class CreateUpdateDeleteCommentMixin:
+class CreateUpdateDeleteCommentMixin(RequestCacheMixin):
     model = Comment
     form_class = CommentForm
     template_name = 'blog/comment.html'
 
+    def get_post(self):
+        return self.memoize('post', lambda: get_object_or_404(
+            Post, pk=self.kwargs['post_id']))
+
     def get_success_url(self):
         return reverse_lazy('blog:post_detail',
                             kwargs={'post_id': self.kwargs['post_id']})
@@ -90,9 +90,37 @@ class Post(PublishedModel):
                               blank=True,
                               upload_to='blogicum_images')
 
+    image_variants = models.JSONField('Уменьшенные копии изображения',
+                                      default=dict,
+                                      editable=False)
+
+    comment_count = models.PositiveIntegerField('Количество комментариев',
+                                                default=0,
+                                                editable=False)
+
+    is_visible = models.BooleanField(
+        'Видна в лентах',
+        default=False,
+        editable=False,
+        help_text='Опубликована, в опубликованной категории и её время '
+                  'публикации наступило.'
+    )
+
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            # Feeds of PublishedPostsManager, newest first
+            models.Index(fields=('-pub_date', '-id'),
+                         condition=models.Q(is_visible=True),
+                         name='post_visible_pub_date_idx'),
+            models.Index(fields=('category', '-pub_date'),
+                         condition=models.Q(is_visible=True),
+                         name='post_category_visible_idx'),
+            # Profile pages also list the author's hidden posts
+            models.Index(fields=('author', '-pub_date'),
+                         name='post_author_pub_date_idx'),
+        )
 
 
     objects = models.Manager()
@@ -103,6 +131,10 @@ class Post(PublishedModel):
     def __str__(self):
         return self.title[:settings.TITLE_LEN]
 
+    def is_public(self):
+        """Same check as PublishedPostsManager, made on a loaded post"""
+        return self.is_visible
+
 
 class Comment(models.Model):
     """Comment model"""
@@ -119,11 +151,70 @@ class Comment(models.Model):
                                       auto_now_add=True)
 
     post = models.ForeignKey(Post, related_name='comments',
-                             on_delete=models.CASCADE)
+                             on_delete=models.CASCADE,
+                             db_index=False)
 
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            # Comments of a post in keyset order, also serves the foreign key
+            models.Index(fields=('post', 'created_at', 'id'),
+                         name='comment_post_created_at_idx'),
+        )
 
     def __str__(self):
         return self.title[:settings.TITLE_LEN]
+
+
+class SitemapEntry(models.Model):
+    """Precomputed sitemap URL, maintained by blog/sitemaps.py"""
+
+    POSTS = 'posts'
+    CATEGORIES = 'categories'
+    PROFILES = 'profiles'
+    SECTIONS = (
+        (POSTS, 'Публикации'),
+        (CATEGORIES, 'Категории'),
+        (PROFILES, 'Профили'),
+    )
+
+    section = models.CharField('Раздел', max_length=16, choices=SECTIONS)
+    object_id = models.BigIntegerField('Идентификатор объекта')
+    # object_id // SITEMAP_SHARD_SIZE, the file of the sitemap the URL is in
+    shard = models.PositiveIntegerField('Часть карты сайта')
+    location = models.CharField('Адрес', max_length=settings.MAX_LENGTH)
+    lastmod = models.DateTimeField('Последнее изменение')
+
+    class Meta:
+        verbose_name = 'адрес карты сайта'
+        verbose_name_plural = 'Карта сайта'
+        constraints = (
+            models.UniqueConstraint(fields=('section', 'object_id'),
+                                    name='sitemap_entry_object_uniq'),
+        )
+        indexes = (
+            models.Index(fields=('section', 'shard', 'lastmod'),
+                         name='sitemap_entry_shard_idx'),
+        )
+
+    def __str__(self):
+        return self.location
+
+
+class SitemapVersion(models.Model):
+    """Single row, changed in the transaction of every sitemap update
+
+    Views validate and cache the sitemap under it instead of scanning
+    blog_sitemapentry.
+    """
+
+    version = models.PositiveBigIntegerField('Версия', default=0)
+    updated_at = models.DateTimeField('Обновлено', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'версия карты сайта'
+        verbose_name_plural = 'Версии карты сайта'
+
+    def __str__(self):
+        return str(self.version)
@@ -0,0 +1,68 @@
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue
+
+from .models import Post
+
+
+"""Scheduled publication
+
+Feeds show the posts with Post.is_visible set. The flag is computed when a
+post or its category is saved, and a background job flips it for deferred
+posts at their pub_date, so no feed query compares pub_date with now.
+"""
+
+PUBLISH_TASK = 'blog.publication.publish_due_posts'
+
+# Sent with post_ids whenever the visibility of posts changes in bulk:
+# a deferred post gets published or its category is shown or hidden.
+visibility_changed = Signal()
+
+
+def visible_condition(now=None):
+    return Q(is_published=True, category__is_published=True,
+             pub_date__lte=now or timezone.now())
+
+
+def is_visible(post, now=None):
+    """Visibility of a post about to be saved"""
+    return (post.is_published
+            and post.pub_date <= (now or timezone.now())
+            and post.category_id is not None
+            and post.category.is_published)
+
+
+def refresh_visibility(queryset):
+    """Brings is_visible of the posts up to date, returns the changed ones"""
+    condition = visible_condition()
+    shown = list(queryset.filter(condition, is_visible=False)
+                 .values_list('pk', flat=True))
+    hidden = list(queryset.filter(is_visible=True).exclude(condition)
+                  .values_list('pk', flat=True))
+    if shown:
+        Post.objects.filter(pk__in=shown).update(is_visible=True)
+    if hidden:
+        Post.objects.filter(pk__in=hidden).update(is_visible=False)
+    if shown or hidden:
+        visibility_changed.send(sender=Post, post_ids=shown + hidden)
+    return shown + hidden
+
+
+def publish_due_posts():
+    """Job run at the pub_date of deferred posts"""
+    return refresh_visibility(Post.objects.filter(
+        is_visible=False, is_published=True, pub_date__lte=timezone.now()))
+
+
+def schedule_publication(pub_date):
+    """Queues publish_due_posts for the moment the post has to appear
+
+    One job publishes all the posts due by its run_at, so saving a
+    deferred post again without moving it queues nothing.
+    """
+    if not Job.objects.filter(task=PUBLISH_TASK, status=Job.QUEUED,
+                              run_at=pub_date).exists():
+        enqueue(PUBLISH_TASK, run_at=pub_date)
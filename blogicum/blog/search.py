@@ -0,0 +1,115 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models.expressions import RawSQL
+
+from .caching import COUNTS_VERSION_KEY, bump_version
+
+
+"""Full-text index of posts
+
+The blog_post_search table keeps one document per post: its title, its
+text and the text of all its comments. On SQLite it is an FTS5 virtual
+table keyed by rowid, on PostgreSQL a tsvector column with a GIN index.
+The table is created by migration 0007_post_search.
+"""
+
+SEARCH_TABLE = 'blog_post_search'
+
+# Text search configuration used on PostgreSQL
+SEARCH_CONFIG = 'russian'
+
+# Weights of the title, the text and the comments of a post
+SQLITE_RANK = f'-bm25({SEARCH_TABLE}, 10.0, 4.0, 1.0)'
+
+SQLITE_INDEX = f'''
+    INSERT INTO {SEARCH_TABLE} (rowid, title, text, comments)
+    SELECT p.id, p.title, p.text,
+           COALESCE((SELECT group_concat(c.text, ' ') FROM blog_comment c
+                     WHERE c.post_id = p.id), '')
+    FROM blog_post p
+'''
+
+POSTGRESQL_DOCUMENT = f'''
+    setweight(to_tsvector('{SEARCH_CONFIG}', p.title), 'A')
+    || setweight(to_tsvector('{SEARCH_CONFIG}', p.text), 'B')
+    || setweight(to_tsvector('{SEARCH_CONFIG}', COALESCE(
+        (SELECT string_agg(c.text, ' ') FROM blog_comment c
+         WHERE c.post_id = p.id), '')), 'C')
+'''
+
+POSTGRESQL_INDEX = f'''
+    INSERT INTO {SEARCH_TABLE} (post_id, document)
+    SELECT p.id, {POSTGRESQL_DOCUMENT}
+    FROM blog_post p
+'''
+
+POSTGRESQL_UPSERT = (' ON CONFLICT (post_id)'
+                     ' DO UPDATE SET document = EXCLUDED.document')
+
+POSTGRESQL_QUERY = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+
+
+def index_posts(*post_ids):
+    """Brings the documents of the given posts up to date"""
+    post_ids = [pk for pk in post_ids if pk is not None]
+    if not post_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'{POSTGRESQL_INDEX} WHERE p.id IN '
+                           f'({placeholders}){POSTGRESQL_UPSERT}', post_ids)
+        else:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN '
+                           f'({placeholders})', post_ids)
+            cursor.execute(f'{SQLITE_INDEX} WHERE p.id IN ({placeholders})',
+                           post_ids)
+    # Numbers of search results are cached along with the post counts
+    bump_version(COUNTS_VERSION_KEY)
+
+
+def unindex_post(post_id):
+    """Drops the document of a deleted post"""
+    column = 'post_id' if connection.vendor == 'postgresql' else 'rowid'
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE {column} = %s',
+                       [post_id])
+    bump_version(COUNTS_VERSION_KEY)
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Indexes all the posts from scratch"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        if connections[using].vendor == 'postgresql':
+            cursor.execute(POSTGRESQL_INDEX)
+        else:
+            cursor.execute(SQLITE_INDEX)
+
+
+def fts5_query(query):
+    """Turns user input into FTS5 syntax: every word as a quoted prefix"""
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_posts(queryset, query):
+    """Narrows the posts to those matching the query, best matches first"""
+    if connections[queryset.db].vendor == 'postgresql':
+        matches = RawSQL(f'SELECT post_id FROM {SEARCH_TABLE} '
+                         f'WHERE document @@ {POSTGRESQL_QUERY}', [query])
+        rank = RawSQL(f'SELECT ts_rank(document, {POSTGRESQL_QUERY}) '
+                      f'FROM {SEARCH_TABLE} '
+                      f'WHERE post_id = blog_post.id', [query])
+    else:
+        query = fts5_query(query)
+        if not query:
+            return queryset.none()
+        matches = RawSQL(f'SELECT rowid FROM {SEARCH_TABLE} '
+                         f'WHERE {SEARCH_TABLE} MATCH %s', [query])
+        rank = RawSQL(f'SELECT {SQLITE_RANK} FROM {SEARCH_TABLE} '
+                      f'WHERE {SEARCH_TABLE} MATCH %s '
+                      f'AND rowid = blog_post.id', [query])
+    return (queryset.filter(pk__in=matches).annotate(rank=rank)
+            .order_by('-rank', '-pub_date'))
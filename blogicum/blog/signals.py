@@ -0,0 +1,287 @@
+from threading import local
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from jobs.queue import enqueue
+
+from .caching import (COUNTS_VERSION_KEY, FEEDS_VERSION_KEY,
+                      PAGES_VERSION_KEY, bump_feed_versions, bump_version,
+                      bump_versions)
+from .feeds import feed_streams
+from .images import has_variants, schedule_variants
+from .models import Category, Comment, Location, Post, User
+from .publication import (is_visible, refresh_visibility,
+                          schedule_publication, visibility_changed)
+
+
+"""Posts being deleted
+
+Comments deleted along with their post need no bookkeeping of their own:
+the post is uncached and unindexed as a whole.
+"""
+
+_deleting = local()
+
+
+def deleting_posts():
+    """Ids of the posts this thread is deleting"""
+    if not hasattr(_deleting, 'post_ids'):
+        _deleting.post_ids = set()
+    return _deleting.post_ids
+
+
+@receiver(pre_delete, sender=Post)
+def mark_deleting_post(sender, instance, **kwargs):
+    deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unmark_deleted_post(sender, instance, **kwargs):
+    """Comments of the cascade are deleted before their post"""
+    deleting_posts().discard(instance.pk)
+
+
+"""Post.comment_count bookkeeping"""
+
+
+def change_comment_count(post_id, delta):
+    """Adds delta to the stored number of comments of a post"""
+    Post.objects.filter(pk=post_id).update(
+        comment_count=Greatest(F('comment_count') + delta, 0))
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw, **kwargs):
+    """Keeps the previous post of an edited comment"""
+    if raw or instance.pk is None:
+        return
+    instance._previous_post_id = (
+        Comment.objects.filter(pk=instance.pk)
+        .values_list('post_id', flat=True).first())
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, **kwargs):
+    """Counts a new comment or a comment moved to another post"""
+    if raw:
+        return
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if created or previous_post_id is None:
+        change_comment_count(instance.post_id, 1)
+    elif previous_post_id != instance.post_id:
+        change_comment_count(previous_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Uncounts a comment, including the ones deleted by cascade"""
+    if instance.post_id not in deleting_posts():
+        change_comment_count(instance.post_id, -1)
+
+
+"""Post cards and cached pages invalidation"""
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=User)
+def invalidate_cards(sender, instance, update_fields=None, **kwargs):
+    """Bumps the version of an object shown on post cards"""
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_versions((sender, instance.pk))
+    bump_version(PAGES_VERSION_KEY)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_card(sender, instance, **kwargs):
+    """The card shows the number of comments of its post"""
+    if instance.post_id in deleting_posts():
+        return
+    bump_versions((Post, instance.post_id),
+                  (Post, getattr(instance, '_previous_post_id', None)))
+    bump_version(PAGES_VERSION_KEY)
+
+
+@receiver(visibility_changed, sender=Post)
+def invalidate_shown_cards(sender, post_ids, **kwargs):
+    """A post appearing in or leaving the feeds is like an edit of it"""
+    bump_versions(*((Post, pk) for pk in post_ids))
+    bump_version(PAGES_VERSION_KEY)
+
+
+"""Cached post counts invalidation"""
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Comment)
+@receiver(visibility_changed, sender=Post)
+def invalidate_counts(sender, **kwargs):
+    """Comments count too, they are searched along with their post"""
+    bump_version(COUNTS_VERSION_KEY)
+
+
+"""Cached feeds invalidation"""
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def remember_feed_streams(sender, instance, **kwargs):
+    """Feeds the post is shown in before the change"""
+    instance._previous_feed_streams = (
+        feed_streams(Post.objects.filter(pk=instance.pk, is_visible=True))
+        if instance.pk is not None else set())
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post_feeds(sender, instance, **kwargs):
+    """Regenerates the feeds the post leaves, enters or changes in"""
+    streams = getattr(instance, '_previous_feed_streams', set())
+    if instance.is_visible:
+        streams = streams | feed_streams(Post.objects.filter(pk=instance.pk))
+    if streams:
+        bump_feed_versions(*streams)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_feeds(sender, instance, **kwargs):
+    streams = getattr(instance, '_previous_feed_streams', set())
+    if streams:
+        bump_feed_versions(*streams)
+
+
+@receiver(visibility_changed, sender=Post)
+def invalidate_shown_feeds(sender, post_ids, **kwargs):
+    bump_feed_versions(*feed_streams(Post.objects.filter(pk__in=post_ids)))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_feeds(sender, update_fields=None, **kwargs):
+    """Titles of categories and names of authors are in every feed"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_version(FEEDS_VERSION_KEY)
+
+
+"""Sitemap maintenance"""
+
+
+def schedule_sitemap_update(post_ids=(), category_ids=(), user_ids=()):
+    enqueue('blog.sitemaps.update_sitemap', list(post_ids),
+            [pk for pk in category_ids if pk is not None], list(user_ids))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def update_post_sitemap(sender, instance, raw=False, **kwargs):
+    """Loaded fixtures are handled by the rebuild_sitemap command"""
+    if not raw:
+        schedule_sitemap_update([instance.pk], [instance.category_id],
+                                [instance.author_id])
+
+
+@receiver(visibility_changed, sender=Post)
+def update_shown_posts_sitemap(sender, post_ids, **kwargs):
+    rows = list(Post.objects.filter(pk__in=post_ids)
+                .values_list('category_id', 'author_id'))
+    schedule_sitemap_update(post_ids,
+                            {category_id for category_id, _ in rows},
+                            {author_id for _, author_id in rows})
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def update_category_sitemap(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_sitemap_update(category_ids=[instance.pk])
+
+
+@receiver(post_save, sender=User)
+def update_profile_sitemap(sender, instance, raw, update_fields, **kwargs):
+    """Usernames are a part of the profile URLs"""
+    if raw or update_fields is not None and (
+            set(update_fields) <= {'last_login'}):
+        return
+    schedule_sitemap_update(user_ids=[instance.pk])
+
+
+"""Scheduled publication"""
+
+
+@receiver(pre_save, sender=Post)
+def compute_visibility(sender, instance, **kwargs):
+    instance.is_visible = is_visible(instance)
+
+
+@receiver(post_save, sender=Post)
+def schedule_deferred_post(sender, instance, **kwargs):
+    if instance.is_published and not instance.is_visible and (
+            instance.pub_date > timezone.now()):
+        schedule_publication(instance.pub_date)
+
+
+@receiver(post_save, sender=Category)
+def show_category_posts(sender, instance, raw, **kwargs):
+    """Publishing or hiding a category shows or hides its posts"""
+    if not raw:
+        refresh_visibility(Post.objects.filter(category=instance))
+
+
+@receiver(post_delete, sender=Category)
+def hide_uncategorized_posts(sender, instance, **kwargs):
+    """Posts of a deleted category are left without one"""
+    refresh_visibility(Post.objects.filter(category__isnull=True,
+                                           is_visible=True))
+
+
+"""Full-text index maintenance"""
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw, **kwargs):
+    """Loaded fixtures are indexed by the rebuild_search_index command"""
+    if not raw:
+        enqueue('blog.search.index_posts', instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    enqueue('blog.search.unindex_post', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def index_commented_post(sender, instance, raw=False, **kwargs):
+    """Comments are a part of the document of their post"""
+    if not raw and instance.post_id not in deleting_posts():
+        enqueue('blog.search.index_posts', instance.post_id,
+                getattr(instance, '_previous_post_id', None))
+
+
+"""Resized copies of post images"""
+
+
+@receiver(post_save, sender=Post)
+def resize_saved_image(sender, instance, raw, **kwargs):
+    """Loaded fixtures are handled by the build_image_variants command"""
+    if not raw and instance.image and not has_variants(instance):
+        schedule_variants(instance.pk)
@@ -0,0 +1,196 @@
+import hashlib
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.http import Http404
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views import View
+
+from .models import Category, Post, SitemapEntry, SitemapVersion
+
+
+"""Sitemap
+
+The URLs of visible posts, published categories and authors of visible
+posts are kept in the blog_sitemapentry table. Jobs queued by the signals
+update the entries of the changed objects, rebuild_sitemap() fills the
+table from scratch; both bump the blog_sitemapversion row in the same
+transaction. Every section is split into files of at most
+SITEMAP_SHARD_SIZE URLs by object id, listed by the sitemap index.
+"""
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+def make_entry(section, pk, location, lastmod):
+    return SitemapEntry(section=section, object_id=pk,
+                        shard=pk // settings.SITEMAP_SHARD_SIZE,
+                        location=location, lastmod=lastmod)
+
+
+def post_entries(posts, lastmod=None):
+    for pk, pub_date, created_at in posts.values_list('pk', 'pub_date',
+                                                      'created_at'):
+        yield make_entry(SitemapEntry.POSTS, pk,
+                         reverse('blog:post_detail', args=[pk]),
+                         lastmod or max(pub_date, created_at))
+
+
+def latest_post_time(published, created):
+    """Last change of the visible posts of a page, None without posts"""
+    return max(published, created) if published else None
+
+
+def category_entries(categories, lastmod=None):
+    visible = Q(posts__is_visible=True)
+    categories = categories.annotate(
+        published=Max('posts__pub_date', filter=visible),
+        created=Max('posts__created_at', filter=visible))
+    for pk, slug, created_at, published, created in categories.values_list(
+            'pk', 'slug', 'created_at', 'published', 'created'):
+        yield make_entry(SitemapEntry.CATEGORIES, pk,
+                         reverse('blog:category_posts', args=[slug]),
+                         lastmod or latest_post_time(published, created)
+                         or created_at)
+
+
+def profile_entries(users, lastmod=None):
+    users = users.filter(posts__is_visible=True).annotate(
+        published=Max('posts__pub_date'), created=Max('posts__created_at'))
+    for pk, username, published, created in users.values_list(
+            'pk', 'username', 'published', 'created'):
+        yield make_entry(SitemapEntry.PROFILES, pk,
+                         reverse('blog:profile', args=[username]),
+                         lastmod or latest_post_time(published, created))
+
+
+def store(entries):
+    """Saves the entries in batches"""
+    entries = iter(entries)
+    batch = list(islice(entries, BATCH_SIZE))
+    while batch:
+        SitemapEntry.objects.bulk_create(batch)
+        batch = list(islice(entries, BATCH_SIZE))
+
+
+def bump_sitemap_version():
+    """Called in the transaction that changes the entries"""
+    now = timezone.now()
+    if not SitemapVersion.objects.filter(pk=1).update(
+            version=F('version') + 1, updated_at=now):
+        SitemapVersion.objects.create(pk=1, version=1, updated_at=now)
+
+
+def update_sitemap(post_ids=(), category_ids=(), user_ids=()):
+    """Job: brings the entries of the changed objects up to date"""
+    now = timezone.now()
+    sections = (
+        (SitemapEntry.POSTS, post_ids, post_entries(
+            Post.objects.filter(pk__in=post_ids, is_visible=True), now)),
+        (SitemapEntry.CATEGORIES, category_ids, category_entries(
+            Category.objects.filter(pk__in=category_ids, is_published=True),
+            now)),
+        (SitemapEntry.PROFILES, user_ids, profile_entries(
+            User.objects.filter(pk__in=user_ids), now)),
+    )
+    with transaction.atomic():
+        for section, ids, entries in sections:
+            if ids:
+                SitemapEntry.objects.filter(section=section,
+                                            object_id__in=ids).delete()
+                store(entries)
+        bump_sitemap_version()
+
+
+def rebuild_sitemap():
+    """Job: fills the sitemap from scratch"""
+    with transaction.atomic():
+        SitemapEntry.objects.all().delete()
+        store(post_entries(Post.objects.filter(is_visible=True)))
+        store(category_entries(Category.objects.filter(is_published=True)))
+        store(profile_entries(User.objects.all()))
+        bump_sitemap_version()
+
+
+"""Views"""
+
+
+class SitemapMixin:
+    """Renders the sitemap XML once per version of the sitemap table
+
+    The version is read from the database rather than from a cache key,
+    as the entries are written by run_jobs, possibly with a cache of its
+    own. It is a single row, so no request scans the entries.
+    """
+
+    def get_context_data(self, **kwargs):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        version, updated_at = (
+            SitemapVersion.objects.filter(pk=1)
+            .values_list('version', 'updated_at').first() or (0, None))
+        # The time keeps a restored database from reusing a version
+        state = (f'{version}-{updated_at.timestamp():.6f}'
+                 if updated_at else '0')
+        timestamp = int(updated_at.timestamp()) if updated_at else None
+        etag = quote_etag(state)
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=timestamp)
+        if response is not None:
+            return response
+        key = 'blog:sitemap:{}:{}'.format(state, hashlib.md5(
+            request.build_absolute_uri().encode()).hexdigest())
+        response = cache.get(key)
+        if response is None:
+            response = render(request, self.template_name,
+                              self.get_context_data(**kwargs),
+                              content_type='application/xml')
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+
+class SitemapIndexView(SitemapMixin, View):
+    """sitemap.xml, the list of the section files"""
+
+    template_name = 'sitemap/index.xml'
+
+    def get_context_data(self, **kwargs):
+        shards = (SitemapEntry.objects.values('section', 'shard')
+                  .annotate(lastmod=Max('lastmod'))
+                  .order_by('section', 'shard'))
+        return {'sitemaps': [
+            {'location': self.request.build_absolute_uri(reverse(
+                'blog:sitemap_section',
+                args=[shard['section'], shard['shard']])),
+             'lastmod': shard['lastmod']}
+            for shard in shards]}
+
+
+class SitemapSectionView(SitemapMixin, View):
+    """A file of at most SITEMAP_SHARD_SIZE URLs of a section"""
+
+    template_name = 'sitemap/urlset.xml'
+
+    def get_context_data(self, section, shard):
+        if section not in dict(SitemapEntry.SECTIONS):
+            raise Http404('Раздел карты сайта не найден')
+        entries = (SitemapEntry.objects.filter(section=section, shard=shard)
+                   .order_by('object_id').values_list('location', 'lastmod'))
+        if not entries.exists():
+            raise Http404('Раздел карты сайта не найден')
+        return {'base': self.request.build_absolute_uri('/')[:-1],
+                'entries': entries}
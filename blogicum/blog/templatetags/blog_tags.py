@@ -0,0 +1,33 @@
+from django import template
+
+from blog.caching import post_card_stamp
+from blog.images import has_variants, srcset
+
+
+register = template.Library()
+
+
+@register.filter
+def card_stamp(post):
+    """Version stamp the post card fragment is cached under"""
+    return post_card_stamp(post)
+
+
+@register.simple_tag(takes_context=True)
+def page_query(context, **kwargs):
+    """Query string of another page of the current list, keeping filters"""
+    query = context['request'].GET.copy()
+    for key in ('page', 'after', 'before'):
+        query.pop(key, None)
+    query.update(kwargs)
+    return query.urlencode()
+
+
+@register.inclusion_tag('includes/responsive_image.html')
+def responsive_image(post, sizes='40rem', lazy=False):
+    """Post image with WebP and JPEG srcset-s of its resized copies"""
+    context = {'post': post, 'sizes': sizes, 'lazy': lazy}
+    if has_variants(post):
+        context['webp_srcset'] = srcset(post, 'webp')
+        context['jpeg_srcset'] = srcset(post, 'jpg')
+    return context
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, feeds, sitemaps, views
 
 
 app_name = 'blog'
@@ -17,6 +17,8 @@ urlpatterns = [
          views.DeleteCommentView.as_view(),
          name='delete_comment'),
     path('posts/<int:post_id>/', views.PostDetailView.as_view(), name='post_detail'),
+    path('posts/<int:post_id>/comments/', views.PostCommentsView.as_view(),
+         name='comments'),
     path('profile/edit/', views.EditProfileView.as_view(), 
          name='edit_profile'),
     path('profile/<slug:username>/', views.ProfileDetailView.as_view(),
@@ -24,7 +26,33 @@ urlpatterns = [
     path('category/<slug:category_slug>/',
          views.CategoryPostsView.as_view(),
          name='category_posts'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('posts/create/', views.CreatePostView.as_view(), name='create_post'),
+    path('rss/', feeds.PostsFeed(), name='index_rss'),
+    path('atom/', feeds.AtomPostsFeed(), name='index_atom'),
+    path('category/<slug:category_slug>/rss/', feeds.CategoryFeed(),
+         name='category_rss'),
+    path('category/<slug:category_slug>/atom/', feeds.AtomCategoryFeed(),
+         name='category_atom'),
+    path('profile/<slug:username>/rss/', feeds.AuthorFeed(),
+         name='profile_rss'),
+    path('profile/<slug:username>/atom/', feeds.AtomAuthorFeed(),
+         name='profile_atom'),
+    path('sitemap.xml', sitemaps.SitemapIndexView.as_view(), name='sitemap'),
+    path('sitemap-<slug:section>-<int:shard>.xml',
+         sitemaps.SitemapSectionView.as_view(),
+         name='sitemap_section'),
+    path('api/posts/', api.ApiPostListView.as_view(), name='api_index'),
+    path('api/posts/<int:post_id>/', api.ApiPostDetailView.as_view(),
+         name='api_post_detail'),
+    path('api/posts/<int:post_id>/comments/',
+         api.ApiCommentListView.as_view(),
+         name='api_comments'),
+    path('api/category/<slug:category_slug>/',
+         api.ApiCategoryPostsView.as_view(),
+         name='api_category_posts'),
+    path('api/profile/<slug:username>/', api.ApiProfileView.as_view(),
+         name='api_profile'),
 
     path('', views.PostListView.as_view(), name='index'),
 ]
@@ -1,16 +1,234 @@
+import base64
+import hashlib
+import json
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
 from django.core.paginator import Paginator
-from django.db.models import Count
+from django.db import connections
+from django.db.models import Max, Q, QuerySet
+from django.utils.functional import cached_property
+
+from .caching import (COUNTS_VERSION_KEY, PAGES_VERSION_KEY, get_version,
+                      stamp_time)
+
+
+# Columns read by includes/post_card.html and includes/category_link.html
+POST_CARD_FIELDS = (
+    'id', 'title', 'text', 'pub_date', 'image', 'image_variants',
+    'is_published',
+    'comment_count',
+    'author', 'author__username',
+    'category', 'category__title', 'category__slug',
+    'category__is_published',
+    'location', 'location__name', 'location__is_published',
+)
+
+
+def feed_queryset(queryset):
+    """Prepares posts for the post card lists in a single joined query"""
+    return (queryset.select_related('author', 'category', 'location')
+            .only(*POST_CARD_FIELDS))
+
+
+def feed_validators(queryset):
+    """Validators of a feed: ETag source and last modification time
+
+    The pages version changes on every write that can change a feed, so
+    besides it only the latest pub_date is read, through the feed index,
+    and no query grows with the number of posts.
+    """
+    latest = queryset.aggregate(published=Max('pub_date'))['published']
+    version = get_version(PAGES_VERSION_KEY)
+    last_modified = max(filter(None, (latest, stamp_time(version))))
+    return f'{version}:{latest}', last_modified
+
 
+def estimate_count(queryset):
+    """Rows the PostgreSQL planner expects, None on other databases"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
 
-def count_comments(queryset):
-    """Returns the number of comments for a given post"""
-    comment_count = Count('comments')
-    return queryset.annotate(comment_count=comment_count)
+
+class CachedCountPaginator(Paginator):
+    """Paginator that keeps the number of objects in the cache
+
+    Counts are cached under a version bumped by every post write, see
+    blog/signals.py. Querysets the PostgreSQL planner expects to exceed
+    settings.PAGINATION_ESTIMATE_THRESHOLD rows are not counted at all,
+    the estimate is used instead.
+    """
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        try:
+            sql = str(self.object_list.query).encode()
+        except EmptyResultSet:
+            return 0
+        key = (f'blog:count:{get_version(COUNTS_VERSION_KEY)}:'
+               f'{self.object_list.db}:'
+               f'{hashlib.md5(sql).hexdigest()}')
+        count = cache.get(key)
+        if count is None:
+            count = estimate_count(self.object_list)
+            if (count is None
+                    or count < settings.PAGINATION_ESTIMATE_THRESHOLD):
+                count = self.object_list.count()
+            cache.set(key, count, settings.PAGINATION_COUNT_TIMEOUT)
+        return count
 
 
 def paginate_queryset(request, queryset, page_size):
     """Paginates the queryset"""
-    paginator = Paginator(queryset, page_size)
+    paginator = CachedCountPaginator(queryset, page_size)
     page_number = request.GET.get('page')
     queryset = paginator.get_page(page_number)
     return queryset
+
+
+def page_window(page, on_each_side=2, on_ends=1):
+    """Page numbers to link: the ends and the neighbours of the current one
+
+    Gaps between them are marked with Paginator.ELLIPSIS, so a long feed
+    renders a dozen links instead of one per page.
+    """
+    return list(page.paginator.get_elided_page_range(
+        page.number, on_each_side=on_each_side, on_ends=on_ends))
+
+
+"""Keyset (cursor) pagination"""
+
+
+def encode_cursor(values):
+    """Packs keyset values into an url-safe token"""
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime)
+                          else value for value in values])
+    token = base64.urlsafe_b64encode(payload.encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """Unpacks a token made by encode_cursor, None if it is broken"""
+    if not token:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(payload)
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    # Tokens come from clients: only the scalars encode_cursor writes
+    if not all(isinstance(value, (str, int, float))
+               and not isinstance(value, bool) for value in values):
+        return None
+    try:
+        values = [model._meta.get_field(field.lstrip('-')).to_python(value)
+                  for field, value in zip(ordering, values)]
+    except (ValidationError, TypeError, ValueError, OverflowError):
+        return None
+    # Larger numbers do not fit the bigint columns, SQLite raises on them
+    if any(isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63
+           for value in values):
+        return None
+    return values
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """Selects the rows placed after the values in the given ordering"""
+    names = [field.lstrip('-') for field in ordering]
+    descending = [field.startswith('-') != reverse for field in ordering]
+    condition = Q()
+    for position, name in enumerate(names):
+        lookup = 'lt' if descending[position] else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[position]})
+        for previous, value in zip(names[:position], values):
+            step &= Q(**{previous: value})
+        condition |= step
+    # The leading bound lets the database range-scan the index.
+    bound = 'lte' if descending[0] else 'gte'
+    return Q(**{f'{names[0]}__{bound}': values[0]}) & condition
+
+
+class CursorPage(Sequence):
+    """A page of keyset paginated objects"""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(request, queryset, page_size,
+                    ordering=('-pub_date', '-id')):
+    """Paginates the queryset by ?after= and ?before= cursors
+
+    Only page_size + 1 rows are fetched and no total count is needed.
+    """
+    ordering = list(ordering)
+    reverse_ordering = [field[1:] if field.startswith('-') else f'-{field}'
+                        for field in ordering]
+    model = queryset.model
+    after = decode_cursor(request.GET.get('after'), model, ordering)
+    before = decode_cursor(request.GET.get('before'), model, ordering)
+
+    if after is None and before is not None:
+        rows = list(queryset.filter(keyset_filter(ordering, before,
+                                                  reverse=True))
+                    .order_by(*reverse_ordering)[:page_size + 1])
+        has_previous, has_next = len(rows) > page_size, True
+        object_list = rows[:page_size][::-1]
+    else:
+        if after is not None:
+            queryset = queryset.filter(keyset_filter(ordering, after))
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_previous, has_next = after is not None, len(rows) > page_size
+        object_list = rows[:page_size]
+
+    def cursor(obj):
+        names = [field.lstrip('-') for field in ordering]
+        # Rows of values() querysets are dicts
+        if isinstance(obj, dict):
+            return encode_cursor([obj[name] for name in names])
+        return encode_cursor([getattr(obj, name) for name in names])
+
+    if not object_list:
+        return CursorPage(object_list)
+    return CursorPage(
+        object_list,
+        next_cursor=cursor(object_list[-1]) if has_next else None,
+        previous_cursor=cursor(object_list[0]) if has_previous else None,
+    )
@@ -2,15 +2,21 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models.base import Model as Model
+from django.http import Http404
 from django.views.generic import (CreateView, DeleteView, DetailView,
                                   ListView, UpdateView)
-from django.shortcuts import get_object_or_404
+from django.views.generic.detail import SingleObjectMixin
 from django.urls import reverse_lazy
 
-from .utils import count_comments, paginate_queryset
-from .models import Category, Comment, Post
+from .caching import post_card_stamp, stamp_time
+from .utils import (CachedCountPaginator, feed_queryset, feed_validators,
+                    page_window, paginate_keyset, paginate_queryset)
+from .models import Category, Post
+from .search import search_posts
 from .forms import CommentForm, PostForm
-from .mixins import CreateDeletePostMixin, CreateUpdateDeleteCommentMixin, OnlyAuthorMixin
+from .mixins import (ConditionalGetMixin, CreateDeletePostMixin,
+                     CreateUpdateDeleteCommentMixin, OnlyAuthorMixin,
+                     PageWindowMixin, RequestCacheMixin, StreamingFeedMixin)
 
 
 User = get_user_model()
@@ -19,33 +25,35 @@ User = get_user_model()
 "User-model related CBV-s"
 
 
-class ProfileDetailView(DetailView):
+class ProfileDetailView(RequestCacheMixin, ConditionalGetMixin,
+                        StreamingFeedMixin, DetailView):
     """Profile detail"""
 
+    replica_reads = True
     model = User
     template_name = 'blog/profile.html'
-
-    def get_object(self):
-        return get_object_or_404(User,
-                                 username=self.kwargs['username'])
-
-    def get_queryset(self):
-        if self.request.user == self.get_object():
-            page_obj = count_comments(
-                Post.objects.filter(
-                    author=self.get_object().id).order_by('-pub_date'))
+    slug_field = 'username'
+    slug_url_kwarg = 'username'
+    context_object_name = 'profile'
+
+    def get_posts(self):
+        if self.request.user == self.object:
+            posts = Post.objects.filter(
+                author=self.object).order_by('-pub_date')
         else:
-            page_obj = count_comments(Post.published_ordered_obj.all().filter(
-                    author=self.get_object().id))
+            posts = Post.published_ordered_obj.filter(author=self.object)
+        return feed_queryset(posts)
 
-        return paginate_queryset(self.request,
-                                page_obj,
-                                settings.PAGINATION_PER_PAGE)
+    def get_validators(self):
+        self.object = self.get_object()
+        return feed_validators(self.get_posts())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['profile'] = self.get_object()
-        context['page_obj'] = self.get_queryset()
+        context['page_obj'] = paginate_queryset(self.request,
+                                                self.get_posts(),
+                                                settings.PAGINATION_PER_PAGE)
+        context['page_range'] = page_window(context['page_obj'])
         return context
 
 
@@ -67,14 +75,29 @@ class EditProfileView(LoginRequiredMixin, UpdateView):
 "Post-model related CBV-s"
 
 
-class PostListView(ListView):
+class PostListView(ConditionalGetMixin, StreamingFeedMixin, PageWindowMixin,
+                   ListView):
     """CBV class to display homepage with published posts"""
 
+    replica_reads = True
     model = Post
     template_name = 'blog/index.html'
     paginate_by = 10
+    paginator_class = CachedCountPaginator
+
     def get_queryset(self):
-        return count_comments(Post.published_ordered_obj.all())
+        return feed_queryset(Post.published_ordered_obj.all())
+
+    def get_validators(self):
+        return feed_validators(self.get_queryset())
+
+    def paginate_queryset(self, queryset, page_size):
+        """Offset pages for ?page= links, keyset cursors otherwise"""
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+        page = paginate_keyset(self.request, queryset, page_size)
+        return None, page, page.object_list, page.has_other_pages()
+
 
 class CreatePostView(LoginRequiredMixin, CreateDeletePostMixin, CreateView):
     """CBV for creating posts"""
@@ -104,62 +127,102 @@ class DeletePostView(LoginRequiredMixin, CreateDeletePostMixin,
     pk_url_kwarg = 'post_id'
 
     
-class PostDetailView(DetailView):
+class PostDetailView(RequestCacheMixin, ConditionalGetMixin, DetailView):
     """CBV to display post details"""
 
+    replica_reads = True
     model = Post
     pk_url_kwarg = 'post_id'
     template_name = 'blog/detail.html'
-    
 
-    def get_object(self):
-        post_for_user = get_object_or_404(Post, id=self.kwargs['post_id'])
-        if self.request.user == post_for_user.author:
-            post = post_for_user
-        else:
-            post = get_object_or_404(Post.published_ordered_obj.all(),
-                                    id=self.kwargs['post_id'])
+    def get_queryset(self):
+        return Post.objects.select_related('author', 'category', 'location')
+
+    def get_object(self, queryset=None):
+        post = super().get_object(queryset)
+        if (post.author_id != self.request.user.pk
+                and not post.is_public()):
+            raise Http404('Публикация не найдена')
         return post
 
-    
+    def get_validators(self):
+        post = self.get_object()
+        stamp = post_card_stamp(post)
+        last_modified = max(
+            post.created_at, post.pub_date,
+            *(stamp_time(part) for part in stamp.split('.') if part != '-'))
+        return f'{stamp}:{post.comment_count}', last_modified
+
+    def get_comments(self):
+        """A keyset page of comments, the oldest first"""
+        return paginate_keyset(
+            self.request,
+            # Only the columns includes/comment_list.html shows, and post_id
+            # that the related manager checks on every comment
+            self.object.comments.select_related('author')
+            .only('id', 'post', 'text', 'created_at', 'author__username'),
+            settings.COMMENTS_PER_PAGE,
+            ordering=('created_at', 'id'))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['post'] = self.get_object()
         context['form'] = CommentForm(self.request.POST or None)
-        context['comments'] = self.get_object().comments.order_by('created_at')
+        context['comments'] = self.get_comments()
         return context
 
 
-class CategoryPostsView(ListView):
+class PostCommentsView(PostDetailView):
+    """CBV returns the next batch of comments of a post as an HTML fragment"""
+
+    template_name = 'includes/comment_list.html'
+
+    def get_context_data(self, **kwargs):
+        return {'post': self.object, 'comments': self.get_comments()}
+
+
+class CategoryPostsView(RequestCacheMixin, ConditionalGetMixin,
+                        PageWindowMixin, SingleObjectMixin, ListView):
     """CBV displays published posts for a given category"""
 
-    model = Post
+    replica_reads = True
     template_name = 'blog/category.html'
     slug_url_kwarg = 'category_slug'
+    paginate_by = settings.PAGINATION_PER_PAGE
+    paginator_class = CachedCountPaginator
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object(
+            queryset=Category.objects.filter(is_published=True))
+        return super().get(request, *args, **kwargs)
 
-    def get_object(self):
-        category = get_object_or_404(Category,
-                                 slug=self.kwargs['category_slug'],
-                                 is_published=True)
-        return category
-    
     def get_queryset(self):
-        page_obj = count_comments(Post.published_ordered_obj.all()
-            .select_related('category', 'location')
-            .filter(category__slug=self.kwargs['category_slug'])
-            )
-        page_obj = paginate_queryset(self.request,
-                                 page_obj,
-                                 settings.PAGINATION_PER_PAGE)
-        
-        return page_obj
-    
+        return feed_queryset(
+            Post.published_ordered_obj.filter(category=self.object))
+
+    def get_validators(self):
+        return feed_validators(self.get_queryset())
+
+
+class SearchView(PageWindowMixin, ListView):
+    """CBV displays published posts matching the ?q= query"""
+
+    replica_reads = True
+    template_name = 'blog/search.html'
+    paginate_by = settings.PAGINATION_PER_PAGE
+    paginator_class = CachedCountPaginator
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        if not self.query:
+            return Post.objects.none()
+        return feed_queryset(
+            search_posts(Post.published_ordered_obj.all(), self.query))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['category'] = self.get_object()
-        context['page_obj'] = self.get_queryset()
+        context['query'] = self.query
         return context
-    
+
 
 "Comment-model related CBV-s"
 
@@ -171,8 +234,7 @@ class CommentCreateView(LoginRequiredMixin, CreateUpdateDeleteCommentMixin, Crea
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        form.instance.post = get_object_or_404(Post,
-                                               pk=self.kwargs['post_id'])
+        form.instance.post = self.get_post()
         return super().form_valid(form)
 
 
@@ -184,16 +246,12 @@ class UpdateCommentView(LoginRequiredMixin, CreateUpdateDeleteCommentMixin,
     
     def form_valid(self, form):
         form.instance.author = self.request.user
-        form.instance.post = get_object_or_404(
-            Post, pk=self.kwargs['post_id'])
+        form.instance.post = self.get_post()
         return super().form_valid(form)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['post'] = get_object_or_404(Post,
-                                            pk=self.kwargs['post_id'])
-        context['comment'] = get_object_or_404(Comment,
-                                               pk=self.kwargs['comment_id'])
+        context['post'] = self.get_post()
         return context
 
 
@@ -202,6 +260,3 @@ class DeleteCommentView(LoginRequiredMixin, CreateUpdateDeleteCommentMixin,
     """CBV for deleting comments"""
 
     pk_url_kwarg = 'comment_id'
-
-    def get_object(self):
-        return get_object_or_404(Comment, pk=self.kwargs['comment_id'])
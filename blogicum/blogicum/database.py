@@ -0,0 +1,90 @@
+"""Database settings of the project
+
+SQLite is tuned for many readers and a few writers: the write-ahead log
+lets comment writers and feed readers work at the same time, and the
+busy timeout makes a writer wait for the lock instead of failing with
+"database is locked".
+
+With DB_ENGINE=postgresql the primary and its replicas are configured
+from the POSTGRES_* environment variables, replicas are used by
+blogicum.routers.PrimaryReplicaRouter.
+"""
+
+import os
+
+
+# Applied by blogicum.sqlite3 to every new connection
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,  # milliseconds, first so the others can wait
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # safe with WAL, fsync only on checkpoints
+    'mmap_size': 256 * 1024 * 1024,  # bytes
+    'cache_size': -64 * 1024,  # negative value is in KiB
+    'temp_store': 'MEMORY',
+}
+
+REPLICA_PREFIX = 'replica_'
+
+# Seconds a connection is kept open between requests
+CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 600))
+
+
+def sqlite_database(path):
+    """Settings of a tuned SQLite database"""
+    return {
+        'ENGINE': 'blogicum.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'OPTIONS': {
+            # seconds the sqlite3 module waits for a lock
+            'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+        },
+        # An in-memory test database locks whole tables between
+        # connections, so the threads of the job worker could not share it.
+        'TEST': {'NAME': path.with_name(f'test_{path.name}')},
+    }
+
+
+def postgresql_database(host):
+    """Settings of a PostgreSQL server
+
+    Every worker keeps its connections for CONN_MAX_AGE seconds. Point
+    POSTGRES_HOST and POSTGRES_PORT at PgBouncer and set
+    POSTGRES_PGBOUNCER=1 to share a pool between the workers.
+    """
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', 'blogicum'),
+        'USER': os.getenv('POSTGRES_USER', 'blogicum'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': host,
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        # PgBouncer in transaction mode cannot keep named cursors
+        'DISABLE_SERVER_SIDE_CURSORS': bool(os.getenv('POSTGRES_PGBOUNCER')),
+    }
+
+
+def get_databases(base_dir):
+    """Value of settings.DATABASES"""
+    if os.getenv('DB_ENGINE', 'sqlite') != 'postgresql':
+        return {
+            'default': sqlite_database(base_dir / 'db.sqlite3'),
+        }
+    databases = {
+        'default': postgresql_database(os.getenv('POSTGRES_HOST',
+                                                 'localhost')),
+    }
+    replica_hosts = os.getenv('POSTGRES_REPLICA_HOSTS', '')
+    for number, host in enumerate(filter(None, replica_hosts.split(',')),
+                                  start=1):
+        replica = postgresql_database(host.strip())
+        replica['TEST'] = {'MIRROR': 'default'}
+        databases[f'{REPLICA_PREFIX}{number}'] = replica
+    return databases
+
+
+def replica_aliases(databases):
+    """Aliases of the read replicas among the databases"""
+    return [alias for alias in databases
+            if alias.startswith(REPLICA_PREFIX)]
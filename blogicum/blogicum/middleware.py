@@ -0,0 +1,102 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+from .performance import Metrics, current_metrics, instrument
+from .routers import set_replica_reads
+
+performance_logger = logging.getLogger('blogicum.performance')
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Runs views marked with replica_reads = True on the replicas
+
+    A client that has just written something is pinned to the primary
+    for REPLICA_PIN_SECONDS, so it reads its own writes despite the
+    replication lag.
+    """
+
+    pin_cookie = 'pin_primary'
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (request.method in ('GET', 'HEAD')
+                and getattr(view_class, 'replica_reads', False)
+                and self.pin_cookie not in request.COOKIES):
+            set_replica_reads(True)
+        return None
+
+    def process_response(self, request, response):
+        set_replica_reads(False)
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+                and response.status_code < 400):
+            response.set_cookie(self.pin_cookie, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+class PerformanceMiddleware:
+    """Measures every request when settings.PERFORMANCE_METRICS is on
+
+    Adds a Server-Timing header and logs one JSON line per request. A
+    PERFORMANCE_SAMPLE_RATE share of requests also logs its
+    PERFORMANCE_SLOW_QUERIES slowest queries. When the setting is off
+    the middleware removes itself from the chain.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS:
+            raise MiddlewareNotUsed
+        instrument()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.PERFORMANCE_SAMPLE_RATE
+        metrics = Metrics(settings.PERFORMANCE_SLOW_QUERIES if sampled
+                          else 0)
+        token = current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.execute))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        total = time.perf_counter() - metrics.started
+        response['Server-Timing'] = metrics.server_timing(total)
+        performance_logger.info(json.dumps(
+            self.log_record(request, response, metrics, total),
+            ensure_ascii=False))
+        return response
+
+    def log_record(self, request, response, metrics, total):
+        match = request.resolver_match
+        record = {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 2),
+            'queries': metrics.queries,
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            'template_ms': round(metrics.template_time * 1000, 2),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            'response_bytes': (None if response.streaming
+                               else len(response.content)),
+        }
+        if metrics.slow_queries:
+            record['slow_queries'] = [
+                {'sql_ms': round(duration * 1000, 2), 'sql': sql}
+                for duration, sql in sorted(metrics.slow_queries,
+                                            reverse=True)]
+        return record
@@ -0,0 +1,130 @@
+"""Per-request performance metrics
+
+PerformanceMiddleware puts a Metrics object into a context variable for
+the duration of a request. SQL queries are timed with a database
+execute_wrapper; template renders and cache lookups are timed by
+wrappers installed once by instrument(), which do nothing outside of a
+measured request.
+"""
+
+import heapq
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+current_metrics = ContextVar('performance_metrics', default=None)
+
+_instrumented = set()
+
+
+class Metrics:
+    """What one request spent its time on"""
+
+    def __init__(self, slow_queries=0):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # (duration, sql) of the slowest queries, kept as a min-heap
+        self.slow_queries = []
+        self.slow_queries_limit = slow_queries
+        self.rendering = False
+        self.in_cache = False
+
+    def execute(self, execute, sql, params, many, context):
+        """Database execute_wrapper"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.sql_time += duration
+            if self.slow_queries_limit:
+                push = (heapq.heappush
+                        if len(self.slow_queries) < self.slow_queries_limit
+                        else heapq.heappushpop)
+                push(self.slow_queries, (duration, sql))
+
+    def server_timing(self, total):
+        """Server-Timing header value, durations in milliseconds"""
+        return ', '.join((
+            f'sql;dur={self.sql_time * 1000:.1f};'
+            f'desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+
+def timed_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        metrics = current_metrics.get()
+        # Included templates are a part of the outermost render
+        if metrics is None or metrics.rendering:
+            return render(self, context)
+        metrics.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+            metrics.rendering = False
+    return wrapper
+
+
+def counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.in_cache:
+            return get(self, key, default, version)
+        metrics.in_cache = True
+        try:
+            value = get(self, key, default, version)
+        finally:
+            metrics.in_cache = False
+        if value is default:
+            metrics.cache_misses += 1
+        else:
+            metrics.cache_hits += 1
+        return value
+    return wrapper
+
+
+def counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.in_cache:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        metrics.in_cache = True
+        try:
+            values = get_many(self, keys, version)
+        finally:
+            metrics.in_cache = False
+        metrics.cache_hits += len(values)
+        metrics.cache_misses += len(keys) - len(values)
+        return values
+    return wrapper
+
+
+def instrument():
+    """Wraps template rendering and the configured cache backends, once"""
+    if Template not in _instrumented:
+        Template.render = timed_render(Template.render)
+        _instrumented.add(Template)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if backend not in _instrumented:
+            backend.get = counted_get(backend.get)
+            backend.get_many = counted_get_many(backend.get_many)
+            _instrumented.add(backend)
@@ -0,0 +1,34 @@
+import random
+
+from asgiref.local import Local
+from django.conf import settings
+
+from .database import replica_aliases
+
+
+_state = Local()
+
+
+def set_replica_reads(enabled):
+    """Sends the reads of the current request to the replicas or not"""
+    _state.use_replicas = enabled
+
+
+class PrimaryReplicaRouter:
+    """Writes go to the primary, reads of read-only views to replicas"""
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases(settings.DATABASES)
+        if replicas and getattr(_state, 'use_replicas', False):
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import get_databases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,6 +41,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
+    'jobs.apps.JobsConfig',
     'django_bootstrap5',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -48,13 +52,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blogicum.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blogicum.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.AnonymousPageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -83,13 +90,61 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
+DATABASES = get_databases(BASE_DIR)
+
+DATABASE_ROUTERS = ['blogicum.routers.PrimaryReplicaRouter']
+
+REPLICA_PIN_SECONDS = 5  # reads stay on the primary after a write
+
+
+# Cache
+# Local memory by default, set BLOGICUM_CACHE_DIR to share a file-based
+# cache between several worker processes
+
+CACHE_DIR = os.getenv('BLOGICUM_CACHE_DIR')
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache'
+            if CACHE_DIR else
+            'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': CACHE_DIR or 'blogicum',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
+PAGE_CACHE_TIMEOUT = 60 * 10  # seconds anonymous pages are cached for
+
+# Send the home and profile pages card by card, see StreamingFeedMixin
+STREAM_FEED_PAGES = False
+
+
+# Request performance metrics, see blogicum/middleware.py
+
+PERFORMANCE_METRICS = os.getenv('PERFORMANCE_METRICS', '') == '1'
+
+# Share of measured requests that also log their slowest queries
+PERFORMANCE_SAMPLE_RATE = float(os.getenv('PERFORMANCE_SAMPLE_RATE', '0'))
+
+PERFORMANCE_SLOW_QUERIES = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'blogicum.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -138,6 +193,21 @@ LOGIN_REDIRECT_URL = 'blog:index'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Widths of the resized copies of post images, see blog/images.py
+
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+
+
+# Background jobs, run by `python manage.py run_jobs`
+
+JOBS_MAX_ATTEMPTS = 5
+
+# Seconds before the first retry, doubled on every next one
+JOBS_RETRY_DELAY = 30
+
+# Seconds after which a running job is considered abandoned
+JOBS_LOCK_TIMEOUT = 60 * 10
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/3.2/howto/static-files/
@@ -163,3 +233,14 @@ MAX_LENGTH = 256  # maximum number of characters
 TITLE_LEN = 15  # number of characters for titles
 
 PAGINATION_PER_PAGE = 10  # number of querysets for page
+
+COMMENTS_PER_PAGE = 20  # comments shipped with a post, and per batch
+
+FEED_POSTS = 20  # number of posts in RSS and Atom feeds
+
+SITEMAP_SHARD_SIZE = 50_000  # URLs per sitemap file, the protocol limit
+
+PAGINATION_COUNT_TIMEOUT = 60 * 60  # seconds a cached number of posts lives
+
+# Above this many rows planner estimates replace exact counts (PostgreSQL)
+PAGINATION_ESTIMATE_THRESHOLD = 100_000
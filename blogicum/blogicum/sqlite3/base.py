@@ -0,0 +1,13 @@
+from django.db.backends.sqlite3 import base
+
+from blogicum.database import SQLITE_PRAGMAS
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite backend applying SQLITE_PRAGMAS to every connection"""
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in SQLITE_PRAGMAS.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
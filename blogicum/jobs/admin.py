@@ -0,0 +1,25 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task',
+                    'args',
+                    'status',
+                    'attempts',
+                    'run_at',
+                    'created_at')
+
+    list_filter = ('status', 'task')
+
+    readonly_fields = ('locked_at', 'last_error', 'created_at')
+
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        queryset.update(status=Job.QUEUED, attempts=0, locked_at=None,
+                        run_at=timezone.now())
@@ -0,0 +1,77 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from jobs.queue import claim, due_jobs, requeue_stale_jobs, run_job
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_thread(job_id):
+    """Runs a job on the own database connection of a pool thread"""
+    try:
+        job = claim(job_id)
+        return job is not None and run_job(job)
+    finally:
+        connection.close()
+
+
+def job_done(future, job_id):
+    """Result of a pool thread, errors outside run_job() only logged"""
+    try:
+        return future.result()
+    except Exception:
+        logger.exception('Worker thread of job %s failed', job_id)
+        return False
+
+
+def local_caches():
+    """Aliases of the caches living in the memory of this process"""
+    return [alias for alias, config in settings.CACHES.items()
+            if config['BACKEND'].endswith('.LocMemCache')]
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs in a pool of worker threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Number of worker threads')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once there are no due jobs left')
+
+    def handle(self, *args, **options):
+        # Jobs invalidate cached pages, feeds and counts, which only
+        # works if the web processes read the same cache.
+        local = local_caches()
+        if local:
+            raise CommandError(
+                f'Caches {", ".join(local)} are local to the process; '
+                'set BLOGICUM_CACHE_DIR for both the site and run_jobs')
+        workers = max(options['workers'], 1)
+        # Future of every submitted job: the job stays queued until the
+        # pool thread claims it, so it must not be submitted again
+        running = {}
+        done = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                requeue_stale_jobs()
+                for job_id in due_jobs(workers - len(running),
+                                       exclude=list(running.values())):
+                    running[pool.submit(run_in_thread, job_id)] = job_id
+                if running:
+                    finished, _ = wait(running, timeout=options['poll'],
+                                       return_when=FIRST_COMPLETED)
+                    done += sum(job_done(future, running.pop(future))
+                                for future in finished)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll'])
+        self.stdout.write(self.style.SUCCESS(f'{done} jobs done'))
@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A call of a function that is run later by the run_jobs worker"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Завершилась с ошибкой'),
+    )
+
+    task = models.CharField('Функция', max_length=255)
+    args = models.JSONField('Аргументы', default=list)
+    status = models.CharField('Статус', max_length=16,
+                              choices=STATUSES, default=QUEUED)
+    run_at = models.DateTimeField('Запустить не раньше',
+                                  default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    locked_at = models.DateTimeField('Взята в работу', null=True,
+                                     blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_at', 'id')
+        indexes = (
+            models.Index(fields=('status', 'run_at'),
+                         name='job_status_run_at_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.task}{tuple(self.args)}'
@@ -0,0 +1,93 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+"""Database-backed job queue
+
+Jobs are rows of the jobs_job table, so enqueuing inside a transaction
+makes the job visible to workers only once the transaction commits, and
+a rolled back request leaves no job behind. Workers claim a job by
+switching its status from queued to running with a conditional UPDATE,
+which works the same on SQLite and PostgreSQL without row locks.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, *args, delay=None, run_at=None):
+    """Queues a call of the function at the dotted path task
+
+    The job is due at run_at, delay seconds from now, or right away.
+    """
+    if run_at is None:
+        run_at = timezone.now()
+        if delay:
+            run_at += timedelta(seconds=delay)
+    return Job.objects.create(task=task, args=list(args), run_at=run_at)
+
+
+def due_jobs(limit, exclude=()):
+    """Ids of the due jobs, without the ones this worker already took"""
+    return list(Job.objects.filter(status=Job.QUEUED,
+                                   run_at__lte=timezone.now())
+                .exclude(pk__in=exclude)
+                .values_list('pk', flat=True)[:limit])
+
+
+def claim(job_id):
+    """Takes the job for this worker, None if another one was faster"""
+    claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+        status=Job.RUNNING, locked_at=timezone.now())
+    return Job.objects.get(pk=job_id) if claimed else None
+
+
+def retry_delay(attempts):
+    """Exponential backoff: JOBS_RETRY_DELAY, twice that, and so on"""
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run_job(job):
+    """Calls the job function; done jobs are deleted, failed ones retried"""
+    job.attempts += 1
+    try:
+        import_string(job.task)(*job.args)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < settings.JOBS_MAX_ATTEMPTS:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=retry_delay(job.attempts))
+        else:
+            job.status = Job.FAILED
+        job.locked_at = None
+        job.save(update_fields=('status', 'run_at', 'attempts',
+                                'locked_at', 'last_error'))
+        logger.exception('Job %s failed, attempt %s', job, job.attempts)
+        return False
+    job.delete()
+    return True
+
+
+def requeue_stale_jobs():
+    """Returns to the queue the jobs of workers that died mid-job"""
+    expired = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(status=Job.RUNNING,
+                              locked_at__lt=expired).update(
+        status=Job.QUEUED, locked_at=None)
+
+
+def run_due_jobs(limit=None):
+    """Runs the due jobs one by one in the current thread"""
+    done = 0
+    for job_id in due_jobs(limit):
+        job = claim(job_id)
+        if job is not None:
+            done += run_job(job)
+    return done
@@ -66,6 +66,38 @@ def post_with_another_category(
     )
 
 
+@pytest.fixture
+def dated_posts(
+    request, mixer: Mixer, user, published_category, published_location
+):
+    """Published posts an hour apart, the latest an hour old.
+
+    N_PER_PAGE * 2 + 5 posts, or as many as given by
+    @pytest.mark.parametrize("dated_posts", [count], indirect=True).
+    """
+    now = timezone.now()
+    return mixer.cycle(getattr(request, "param", N_PER_PAGE * 2 + 5)).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=published_location,
+        pub_date=(now - timedelta(hours=hours) for hours in range(1, 100)),
+    )
+
+
+@pytest.fixture
+def published_post(mixer: Mixer, user, published_category,
+                   published_location):
+    """A post published an hour ago, shown in all the feeds."""
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=published_location,
+        pub_date=timezone.now() - timedelta(hours=1),
+    )
+
+
 @pytest.fixture
 def post_of_another_author(
     mixer: Mixer, user, another_user,  published_location, published_category
@@ -0,0 +1,108 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def walk(client, url):
+    """Ids of all the rows of a list, following the next links"""
+    ids = []
+    while url:
+        data = client.get(url).json()
+        ids += [row["id"] for row in data["results"]]
+        url = data["next"]
+    return ids
+
+
+@pytest.mark.parametrize("dated_posts", [N_PER_PAGE + 3], indirect=True)
+@pytest.mark.parametrize(
+    "api_url, page_url",
+    [
+        ("/api/posts/", "/"),
+        ("/api/category/{category}/", "/category/{category}/"),
+        ("/api/profile/{author}/", "/profile/{author}/"),
+    ],
+)
+def test_api_lists_mirror_feeds(client, dated_posts, future_posts,
+                                posts_with_unpublished_category,
+                                api_url, page_url):
+    kwargs = {"category": dated_posts[0].category.slug,
+              "author": dated_posts[0].author.username}
+    html_ids = [
+        post.id
+        for page in (client.get(page_url.format(**kwargs)),
+                     client.get(page_url.format(**kwargs), {"page": 2}))
+        for post in page.context["page_obj"]
+    ]
+    assert walk(client, api_url.format(**kwargs)) == html_ids, (
+        f"Убедитесь, что `{api_url}` по курсорам отдаёт те же публикации"
+        " и в том же порядке, что и соответствующая страница."
+    )
+
+
+def test_api_sparse_fields(client, dated_posts):
+    data = client.get("/api/posts/", {"fields": "id,title"}).json()
+    assert len(data["results"]) == N_PER_PAGE
+    assert all(set(row) == {"id", "title"} for row in data["results"]), (
+        "Убедитесь, что API отдаёт только поля, перечисленные в `?fields=`."
+    )
+    assert "fields=id%2Ctitle" in data["next"], (
+        "Убедитесь, что ссылка на следующую страницу сохраняет `?fields=`."
+    )
+    response = client.get("/api/posts/", {"fields": "id,password"})
+    assert response.status_code == 400, (
+        "Убедитесь, что запрос неизвестных полей отклоняется с кодом 400."
+    )
+
+
+def test_api_list_query_budget(client, dated_posts):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/posts/")
+    assert response.status_code == 200
+    assert len(queries) <= 2, (
+        "Убедитесь, что список публикаций API читается одним запросом"
+        " вместе с автором, категорией и местоположением."
+        f" Выполнено запросов: {len(queries)}."
+    )
+
+
+def test_api_post_visibility(client, user_client, mixer, user,
+                             published_category):
+    post = mixer.blend("blog.Post", author=user, category=published_category,
+                       is_published=False)
+    assert client.get(f"/api/posts/{post.id}/").status_code == 404, (
+        "Убедитесь, что снятая с публикации запись недоступна в API"
+        " другим пользователям."
+    )
+    assert client.get(f"/api/posts/{post.id}/comments/").status_code == 404
+    response = user_client.get(f"/api/posts/{post.id}/")
+    assert response.status_code == 200 and response.json()["id"] == post.id, (
+        "Убедитесь, что автор видит в API свою снятую с публикации запись."
+    )
+
+
+def test_api_comments(client, mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    data = client.get(f"/api/posts/{post.id}/comments/").json()
+    assert [row["id"] for row in data["results"]] == [
+        comment.id for comment in comments]
+    assert data["results"][0]["author"] == comments[0].author.username
+
+
+@pytest.mark.parametrize("url", ["/api/posts/", "/api/posts/{post}/"])
+def test_api_revalidated(client, dated_posts, url):
+    url = url.format(post=dated_posts[0].id)
+    response = client.get(url)
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"), (
+        f"Убедитесь, что `{url}` отдаёт заголовки ETag и Last-Modified."
+    )
+    revalidated = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert revalidated.status_code == 304, (
+        f"Убедитесь, что `{url}` отвечает 304 на If-None-Match, если"
+        " данные не изменились."
+    )
@@ -0,0 +1,114 @@
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+CARD_TEMPLATE = "includes/category_link.html"
+
+
+@pytest.fixture(params=["locmem", "filebased"])
+def cache_backend(request, tmp_path):
+    backends = {
+        "locmem": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "test-cards",
+        },
+        "filebased": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        },
+    }
+    with override_settings(CACHES={"default": backends[request.param]}):
+        caches["default"].clear()
+        yield
+        caches["default"].clear()
+
+
+def render_index(client):
+    response = client.get("/")
+    assert response.status_code == 200
+    rendered = [template.name for template in response.templates]
+    return response.content.decode("utf-8"), rendered
+
+
+def test_warm_cards_skip_rendering(cache_backend, user_client, published_post):
+    _, cold_templates = render_index(user_client)
+    assert CARD_TEMPLATE in cold_templates
+    content, warm_templates = render_index(user_client)
+    assert CARD_TEMPLATE not in warm_templates, (
+        "Убедитесь, что карточка публикации берётся из кэша, если она не"
+        " менялась."
+    )
+    assert published_post.title in content
+
+
+@pytest.mark.parametrize(
+    "change",
+    ["post", "category", "location", "author", "comment"],
+)
+def test_cards_invalidated(cache_backend, user_client, mixer, published_post,
+                           change):
+    render_index(user_client)
+    if change == "post":
+        published_post.title = "Changed post title"
+        published_post.save()
+        expected = published_post.title
+    elif change == "category":
+        published_post.category.title = "Changed category title"
+        published_post.category.save()
+        expected = published_post.category.title
+    elif change == "location":
+        published_post.location.name = "Changed location name"
+        published_post.location.save()
+        expected = published_post.location.name
+    elif change == "author":
+        published_post.author.username = "changed_username"
+        published_post.author.save()
+        expected = published_post.author.username
+    else:
+        mixer.blend("blog.Comment", post=published_post)
+        expected = "Комментарии (1)"
+    content, _ = render_index(user_client)
+    assert expected in content, (
+        f"Убедитесь, что карточка публикации перестраивается после изменения"
+        f" связанного объекта: {change}."
+    )
+
+
+@pytest.mark.parametrize(
+    "url", ["/", "/category/{category}/", "/pages/about/", "/pages/rules/"])
+def test_anonymous_pages_cached(client, published_post, url):
+    url = url.format(category=published_post.category.slug)
+    cold_content, cold_templates = render_index_like(client, url)
+    warm_content, warm_templates = render_index_like(client, url)
+    assert cold_templates and not warm_templates, (
+        f"Убедитесь, что страница `{url}` отдаётся анонимным пользователям"
+        " из кэша."
+    )
+    assert warm_content == cold_content
+
+
+def render_index_like(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.content, response.templates
+
+
+def test_authenticated_bypass_page_cache(user_client, published_post):
+    render_index(user_client)
+    _, templates = render_index(user_client)
+    assert "blog/index.html" in templates, (
+        "Убедитесь, что авторизованным пользователям страницы не отдаются"
+        " из общего кэша."
+    )
+
+
+def test_page_cache_invalidated(client, mixer, published_post):
+    render_index(client)
+    mixer.blend("blog.Comment", post=published_post)
+    content, templates = render_index(client)
+    assert templates and "Комментарии (1)" in content, (
+        "Убедитесь, что кэш страниц сбрасывается при изменении публикаций"
+        " и комментариев."
+    )
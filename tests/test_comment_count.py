@@ -0,0 +1,75 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.caching import PAGES_VERSION_KEY, get_version, get_versions
+from blog.models import Comment, Post
+from jobs.models import Job
+
+pytestmark = [pytest.mark.django_db]
+
+
+def stored_count(post):
+    return Post.objects.values_list("comment_count", flat=True).get(
+        pk=post.pk)
+
+
+def test_comment_count_follows_views(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    for i in range(3):
+        user_client.post(f"/posts/{post.id}/comment/", {"text": f"text {i}"})
+    assert stored_count(post) == 3, (
+        "Убедитесь, что счётчик комментариев публикации увеличивается при"
+        " добавлении комментария."
+    )
+    comment = Comment.objects.filter(post=post).first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    assert stored_count(post) == 2, (
+        "Убедитесь, что счётчик комментариев публикации уменьшается при"
+        " удалении комментария."
+    )
+
+
+def test_comment_count_follows_cascade(
+        mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post, author=another_user)
+    mixer.blend("blog.Comment", post=post)
+    assert stored_count(post) == 3
+    another_user.delete()
+    assert stored_count(post) == 1
+
+
+def test_post_delete_skips_comment_bookkeeping(
+        mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(50).blend("blog.Comment", post=post)
+    Job.objects.all().delete()
+    with CaptureQueriesContext(connection) as queries:
+        post.delete()
+    assert len(queries) <= 10, (
+        "Убедитесь, что удаление публикации не обновляет счётчик и"
+        " поисковый индекс для каждого её комментария."
+    )
+    assert Job.objects.filter(task="blog.search.index_posts").count() == 0
+    assert Job.objects.filter(task="blog.search.unindex_post").count() == 1
+
+
+def test_recount_comments_repairs_drift(
+        mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=42)
+    card, pages = get_versions((Post, post.pk)), get_version(
+        PAGES_VERSION_KEY)
+    call_command("recount_comments", stdout=StringIO())
+    assert stored_count(post) == 2
+    assert card != get_versions((Post, post.pk)) and pages != get_version(
+        PAGES_VERSION_KEY), (
+        "Убедитесь, что пересчёт комментариев сбрасывает кэш карточек и"
+        " страниц исправленных публикаций."
+    )
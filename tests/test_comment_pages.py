@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+COMMENT_ANCHOR = re.compile(r'name="comment_(\d+)"')
+
+
+@pytest.fixture
+def comments(mixer, settings, post_with_published_location):
+    settings.COMMENTS_PER_PAGE = 3
+    return mixer.cycle(7).blend(
+        "blog.Comment", post=post_with_published_location)
+
+
+def shown_ids(response):
+    return [int(pk) for pk in
+            COMMENT_ANCHOR.findall(response.content.decode("utf-8"))]
+
+
+def test_detail_ships_first_comments(client, comments):
+    post = comments[0].post
+    response = client.get(f"/posts/{post.id}/")
+    assert shown_ids(response) == [comment.id for comment in comments[:3]], (
+        "Убедитесь, что страница публикации показывает только первые"
+        " COMMENTS_PER_PAGE комментариев, начиная с самых старых."
+    )
+    assert response.context["comments"].next_cursor, (
+        "Убедитесь, что для следующих комментариев передаётся курсор."
+    )
+
+
+def test_fragment_returns_next_batches(client, comments):
+    post = comments[0].post
+    page = client.get(f"/posts/{post.id}/").context["comments"]
+    ids = [comment.id for comment in page]
+    while page.next_cursor:
+        response = client.get(
+            f"/posts/{post.id}/comments/", {"after": page.next_cursor})
+        assert response.status_code == 200
+        assert b"<header>" not in response.content, (
+            "Убедитесь, что следующие комментарии отдаются фрагментом"
+            " без шапки страницы."
+        )
+        page = response.context["comments"]
+        assert shown_ids(response) == [comment.id for comment in page]
+        ids += [comment.id for comment in page]
+    assert ids == [comment.id for comment in comments], (
+        "Убедитесь, что по курсорам можно получить все комментарии"
+        " по одному разу и по порядку."
+    )
+
+
+def test_fragment_of_hidden_post(client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False)
+    assert client.get(f"/posts/{post.id}/comments/").status_code == 404, (
+        "Убедитесь, что комментарии снятой с публикации записи"
+        " недоступны другим пользователям."
+    )
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+PAGES = [
+    "/",
+    "/category/{category}/",
+    "/profile/{author}/",
+    "/posts/{post}/",
+]
+
+
+def page_url(url, post):
+    return url.format(category=post.category.slug,
+                      author=post.author.username, post=post.id)
+
+
+@pytest.mark.parametrize("url", PAGES)
+@pytest.mark.parametrize("logged_in", [True, False])
+def test_not_modified(client, user_client, published_post, url, logged_in):
+    client = user_client if logged_in else client
+    url = page_url(url, published_post)
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified"), (
+        f"Убедитесь, что страница `{url}` отдаёт заголовки ETag и"
+        " Last-Modified."
+    )
+    revalidated = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert revalidated.status_code == HTTPStatus.NOT_MODIFIED, (
+        f"Убедитесь, что страница `{url}` отвечает 304 на If-None-Match,"
+        " если она не изменилась."
+    )
+    revalidated = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert revalidated.status_code == HTTPStatus.NOT_MODIFIED, (
+        f"Убедитесь, что страница `{url}` отвечает 304 на"
+        " If-Modified-Since, если она не изменилась."
+    )
+
+
+@pytest.mark.parametrize("url", PAGES)
+def test_modified_after_comment(user_client, mixer, published_post, url):
+    url = page_url(url, published_post)
+    etag = user_client.get(url)["ETag"]
+    mixer.blend("blog.Comment", post=published_post)
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Убедитесь, что после нового комментария страница `{url}`"
+        " отдаётся заново."
+    )
+    assert response["ETag"] != etag
+
+
+@pytest.mark.parametrize("url", PAGES[:3])
+def test_validators_do_not_scan_feed(user_client, published_post, url):
+    url = page_url(url, published_post)
+    etag = user_client.get(url)["ETag"]
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    sql = " ".join(query["sql"] for query in queries)
+    assert "COUNT(" not in sql and "SUM(" not in sql, (
+        f"Убедитесь, что ETag страницы `{url}` строится без подсчёта всех"
+        " публикаций и комментариев ленты."
+    )
+
+
+def test_modified_after_csrf_rotation(user_client, published_post):
+    url = page_url("/posts/{post}/", published_post)
+    etag = user_client.get(url)["ETag"]
+    # A new login rotates the CSRF token of the comment form
+    user_client.cookies["csrftoken"] = "a" * 64
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что после смены CSRF-токена страница с формой"
+        " отдаётся заново, а не подтверждается ответом 304."
+    )
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.caching import feed_version_key
+from blog.models import Post
+from blog.publication import publish_due_posts
+
+pytestmark = [pytest.mark.django_db]
+
+FEED_URLS = [
+    "/rss/",
+    "/atom/",
+    "/category/{category}/rss/",
+    "/category/{category}/atom/",
+    "/profile/{author}/rss/",
+    "/profile/{author}/atom/",
+]
+
+
+def feed_url(url, post):
+    return url.format(category=post.category.slug,
+                      author=post.author.username)
+
+
+def link(post):
+    return f"/posts/{post.id}/".encode()
+
+
+@pytest.mark.parametrize("url", FEED_URLS)
+def test_feed_shows_published_posts(client, published_post, mixer, url):
+    hidden = mixer.blend("blog.Post", author=published_post.author,
+                         category=published_post.category, is_published=False)
+    response = client.get(feed_url(url, published_post))
+    assert response.status_code == 200
+    assert link(published_post) in response.content, (
+        f"Убедитесь, что лента `{url}` содержит опубликованные записи."
+    )
+    assert link(hidden) not in response.content, (
+        f"Убедитесь, что лента `{url}` не содержит снятых с публикации"
+        " записей."
+    )
+
+
+@pytest.mark.parametrize("url", FEED_URLS)
+def test_feed_served_from_cache(client, published_post, url):
+    url = feed_url(url, published_post)
+    first = client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(url)
+    assert second.content == first.content
+    assert not queries, (
+        f"Убедитесь, что лента `{url}` отдаётся из кэша без запросов к базе"
+        " данных."
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert response.status_code == 304 and not queries, (
+        "Убедитесь, что ленты поддерживают условные GET-запросы."
+    )
+
+
+def test_feed_regenerated_on_post_change(client, published_post, mixer,
+                                         another_category):
+    url = feed_url("/category/{category}/rss/", published_post)
+    etag = client.get(url)["ETag"]
+    mixer.blend("blog.Post", author=published_post.author,
+                category=another_category, is_published=False)
+    assert client.get(url)["ETag"] == etag, (
+        "Убедитесь, что изменения, не затрагивающие ленту, её не"
+        " перестраивают."
+    )
+    published_post.title = "Новый заголовок"
+    published_post.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert "Новый заголовок" in response.content.decode(), (
+        "Убедитесь, что лента перестраивается при изменении её публикации."
+    )
+    published_post.category = another_category
+    published_post.save()
+    assert link(published_post) not in client.get(url).content, (
+        "Убедитесь, что публикация пропадает из ленты прежней категории."
+    )
+
+
+def test_feed_shows_published_deferred_post(client, published_post, mixer):
+    deferred = mixer.blend("blog.Post", author=published_post.author,
+                           category=published_post.category, is_published=True,
+                           pub_date=timezone.now() + timedelta(minutes=5))
+    assert link(deferred) not in client.get("/rss/").content
+    Post.objects.filter(pk=deferred.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1))
+    publish_due_posts()
+    assert link(deferred) in client.get("/rss/").content, (
+        "Убедитесь, что ленты перестраиваются при публикации отложенной"
+        " записи."
+    )
+
+
+def test_feed_of_unpublished_category(client, mixer):
+    category = mixer.blend("blog.Category", is_published=False)
+    assert client.get(f"/category/{category.slug}/rss/").status_code == 404
+
+
+@pytest.mark.parametrize("url, stream", [
+    ("/category/missing/rss/", "category:missing"),
+    ("/profile/missing/atom/", "author:missing"),
+])
+def test_missing_feed_leaves_no_stamp(client, url, stream):
+    assert client.get(url).status_code == 404
+    assert cache.get(feed_version_key(stream)) is None, (
+        "Убедитесь, что для лент несуществующих категорий и авторов не"
+        " создаются версии в кэше."
+    )
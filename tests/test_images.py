@@ -0,0 +1,87 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.images import build_variants, variant_name
+from jobs.models import Job
+from jobs.queue import run_due_jobs
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.IMAGE_VARIANT_WIDTHS = (100, 200, 400)
+    return tmp_path
+
+
+@pytest.fixture
+def post_with_image(post_with_published_location):
+    post = post_with_published_location
+    buffer = BytesIO()
+    Image.new("RGB", (300, 150), "red").save(buffer, format="PNG")
+    post.image.save("photo.png", ContentFile(buffer.getvalue()))
+    return post
+
+
+def test_build_variants(media_root, post_with_image):
+    post = post_with_image
+    assert build_variants(post.id)
+    post.refresh_from_db()
+    assert post.image_variants == {"source": post.image.name,
+                                   "widths": [100, 200]}, (
+        "Убедитесь, что изображение уменьшается только до ширин меньше"
+        " исходной."
+    )
+    for width in (100, 200):
+        for extension, image_format in (("webp", "WEBP"), ("jpg", "JPEG")):
+            path = media_root / variant_name(post.image.name, width,
+                                             extension)
+            with Image.open(path) as variant:
+                assert variant.format == image_format
+                assert variant.size == (width, width // 2)
+    assert not build_variants(post.id)
+
+
+def test_upload_queues_variants(post_with_image):
+    jobs = Job.objects.filter(task="blog.images.build_variants")
+    assert {tuple(job.args) for job in jobs} == {(post_with_image.id,)}, (
+        "Убедитесь, что уменьшенные копии изображения строятся фоновой"
+        " задачей, а не во время запроса."
+    )
+    run_due_jobs()
+    post_with_image.refresh_from_db()
+    assert post_with_image.image_variants["widths"] == [100, 200]
+
+
+def test_feeds_render_srcset(client, post_with_image):
+    content = client.get("/").content.decode("utf-8")
+    assert "srcset" not in content
+    build_variants(post_with_image.id)
+    for url in ("/", f"/posts/{post_with_image.id}/"):
+        content = client.get(url).content.decode("utf-8")
+        assert 'type="image/webp"' in content and "-200w.jpg 200w" in content, (
+            f"Убедитесь, что страница `{url}` выводит уменьшенные копии"
+            " изображения через srcset."
+        )
+        assert content.count(f'alt="{post_with_image.title}"') == 1
+
+
+def test_replaced_image_drops_old_variants(client, post_with_image):
+    post = post_with_image
+    build_variants(post.id)
+    post.image.save("other.png", ContentFile(post.image.read()))
+    content = client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert "srcset" not in content, (
+        "Убедитесь, что копии заменённого изображения не выводятся."
+    )
+
+
+def test_backfill_command(post_with_image):
+    call_command("build_image_variants", stdout=StringIO())
+    post_with_image.refresh_from_db()
+    assert post_with_image.image_variants["widths"] == [100, 200]
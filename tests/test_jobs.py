@@ -0,0 +1,113 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.management.commands import run_jobs
+from jobs.queue import (claim, due_jobs, enqueue, requeue_stale_jobs,
+                        run_due_jobs)
+
+CALLS = []
+
+
+def record_call(*args):
+    CALLS.append(args)
+
+
+def fail(*args):
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def calls():
+    CALLS.clear()
+    return CALLS
+
+
+@pytest.mark.django_db
+def test_job_runs_and_is_deleted(calls):
+    enqueue("test_jobs.record_call", 1, "two")
+    enqueue("test_jobs.record_call", 3, delay=60)
+    assert run_due_jobs() == 1
+    assert calls == [(1, "two")]
+    assert Job.objects.get().args == [3], (
+        "Убедитесь, что отложенная задача не запускается раньше времени."
+    )
+
+
+@pytest.mark.django_db
+def test_failed_job_is_retried_with_backoff(settings):
+    settings.JOBS_MAX_ATTEMPTS = 2
+    settings.JOBS_RETRY_DELAY = 10
+    job = enqueue("test_jobs.fail")
+    run_due_jobs()
+    job.refresh_from_db()
+    assert job.status == Job.QUEUED and job.attempts == 1
+    assert "boom" in job.last_error
+    assert job.run_at > timezone.now() + timedelta(seconds=5)
+    Job.objects.update(run_at=timezone.now())
+    run_due_jobs()
+    job.refresh_from_db()
+    assert job.status == Job.FAILED and job.attempts == 2, (
+        "Убедитесь, что задача помечается неудачной после последней попытки."
+    )
+
+
+@pytest.mark.django_db
+def test_abandoned_job_is_requeued(settings):
+    job = enqueue("test_jobs.record_call")
+    Job.objects.update(status=Job.RUNNING, locked_at=timezone.now()
+                       - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT + 1))
+    assert requeue_stale_jobs() == 1
+    job.refresh_from_db()
+    assert job.status == Job.QUEUED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_command_drains_queue(calls, shared_cache):
+    for number in range(10):
+        enqueue("test_jobs.record_call", number)
+    out = StringIO()
+    call_command("run_jobs", "--once", "--workers", "3", "--poll", "0.1",
+                 stdout=out)
+    assert sorted(calls) == [(number,) for number in range(10)]
+    assert not Job.objects.exists()
+    assert "10 jobs done" in out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_survives_thread_errors(calls, shared_cache, monkeypatch):
+    failed = []
+
+    def flaky_claim(job_id):
+        if not failed:
+            failed.append(job_id)
+            raise RuntimeError("database went away")
+        return claim(job_id)
+
+    monkeypatch.setattr(run_jobs, "claim", flaky_claim)
+    for number in range(3):
+        enqueue("test_jobs.record_call", number)
+    out = StringIO()
+    call_command("run_jobs", "--once", "--poll", "0.1", stdout=out)
+    assert sorted(calls) == [(number,) for number in range(3)], (
+        "Убедитесь, что ошибка в потоке обработчика не останавливает его."
+    )
+    assert "3 jobs done" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_taken_jobs_not_due_again():
+    taken = enqueue("test_jobs.record_call")
+    waiting = enqueue("test_jobs.record_call")
+    assert due_jobs(10, exclude=[taken.pk]) == [waiting.pk]
+
+
+@pytest.mark.django_db
+def test_worker_command_needs_shared_cache():
+    with pytest.raises(CommandError, match="BLOGICUM_CACHE_DIR"):
+        call_command("run_jobs", "--once", stdout=StringIO())
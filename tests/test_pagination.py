@@ -0,0 +1,154 @@
+import base64
+import re
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+from blog.utils import CachedCountPaginator
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_cursor_pages_cover_feed(client, dated_posts):
+    expected = sorted(dated_posts, key=lambda post: post.pub_date,
+                      reverse=True)
+    seen = []
+    url = "/"
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        page_obj = response.context["page_obj"]
+        seen.extend(page_obj)
+        assert len(page_obj) <= N_PER_PAGE
+        url = f"/?after={page_obj.next_cursor}" if page_obj.has_next() else ""
+    assert [post.id for post in seen] == [post.id for post in expected], (
+        "Убедитесь, что курсорная пагинация главной страницы выдаёт все"
+        " публикации по одному разу, «от новых к старым»."
+    )
+
+
+def test_cursor_previous_page(client, dated_posts):
+    first_page = client.get("/").context["page_obj"]
+    second_page = client.get(
+        f"/?after={first_page.next_cursor}").context["page_obj"]
+    assert second_page.has_previous()
+    back = client.get(
+        f"/?before={second_page.previous_cursor}").context["page_obj"]
+    assert [post.id for post in back] == [post.id for post in first_page]
+    assert not back.has_previous()
+
+
+def test_cursor_links_rendered(client, dated_posts):
+    content = client.get("/").content.decode("utf-8")
+    assert "?after=" in content, (
+        "Убедитесь, что пагинатор главной страницы выводит ссылку на"
+        " следующую страницу по курсору."
+    )
+
+
+def test_offset_links_still_work(client, dated_posts):
+    response = client.get("/?page=2")
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["page_obj"].number == 2
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+def test_broken_cursor_falls_back_to_first_page(client, dated_posts):
+    response = client.get("/?after=not-a-cursor")
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+@pytest.mark.parametrize("payload", [
+    "[{}, 1]", "[[1], 1]", "[1e400, 1]", "[null, null]", "[true, 1]",
+    '["2024-01-01T00:00:00+00:00", 1e30]',
+    '["2024-01-01T00:00:00+00:00", 100000000000000000000000000000]',
+])
+@pytest.mark.parametrize("url", [
+    "/", "/posts/{post}/comments/", "/api/posts/",
+    "/api/posts/{post}/comments/",
+])
+def test_malformed_cursor_falls_back_to_first_page(client, dated_posts,
+                                                   url, payload):
+    url = url.format(post=dated_posts[0].id)
+    token = base64.urlsafe_b64encode(payload.encode()).decode()
+    for name in ("after", "before"):
+        response = client.get(url, {name: token})
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что `{url}` с испорченным курсором {payload}"
+            " отдаёт первую страницу, а не ошибку."
+        )
+
+
+def test_page_links_are_windowed(mixer, client, user, published_category):
+    now = timezone.now()
+    mixer.cycle(N_PER_PAGE * 30).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=(now - timedelta(hours=hours) for hours in range(1, 1000)),
+    )
+    for url in ("/?page=15", f"/category/{published_category.slug}/?page=15",
+                f"/profile/{user.username}/?page=15"):
+        content = client.get(url).content.decode("utf-8")
+        page_links = {int(number)
+                      for number in re.findall(r"page=(\d+)\"", content)}
+        assert {1, 13, 14, 16, 17, 30} <= page_links, (
+            "Убедитесь, что пагинатор ссылается на первую, последнюю и"
+            " соседние с текущей страницы."
+        )
+        assert not page_links & {3, 10, 20, 28}, (
+            f"Убедитесь, что пагинатор страницы `{url}` не выводит ссылки на"
+            " все страницы подряд."
+        )
+        assert content.count("page-item disabled") == 2
+
+
+def count_queries(queries):
+    return sum("COUNT(" in query["sql"] and "blog_post" in query["sql"]
+               for query in queries)
+
+
+def test_page_count_cached_until_post_write(user_client, mixer, dated_posts):
+    url = f"/category/{dated_posts[0].category.slug}/?page=2"
+    user_client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(url)
+    assert response.context["paginator"].count == len(dated_posts)
+    assert count_queries(queries) == 0, (
+        "Убедитесь, что число публикаций для пагинатора берётся из кэша."
+    )
+    mixer.blend("blog.Post", author=dated_posts[0].author,
+                category=dated_posts[0].category,
+                pub_date=timezone.now() - timedelta(minutes=1))
+    response = user_client.get(url)
+    assert response.context["paginator"].count == len(dated_posts) + 1, (
+        "Убедитесь, что кэш числа публикаций сбрасывается при их изменении."
+    )
+
+
+def test_page_count_estimated_above_threshold(client, settings, monkeypatch,
+                                              dated_posts):
+    settings.PAGINATION_ESTIMATE_THRESHOLD = 1000
+    monkeypatch.setattr("blog.utils.estimate_count", lambda queryset: 5000)
+    response = client.get("/?page=1")
+    assert response.context["paginator"].count == 5000
+    settings.PAGINATION_ESTIMATE_THRESHOLD = 10000
+    Post.objects.filter(pk=dated_posts[0].pk).update(title="Другой")
+    cache.clear()
+    response = client.get("/?page=1")
+    assert response.context["paginator"].count == len(dated_posts)
+
+
+def test_post_admin_uses_cached_count():
+    from blog.admin import PostAdmin
+
+    assert issubclass(PostAdmin.paginator, CachedCountPaginator)
+    assert not PostAdmin.show_full_result_count
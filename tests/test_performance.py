@@ -0,0 +1,53 @@
+import json
+import logging
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def metrics_on(settings):
+    settings.PERFORMANCE_METRICS = True
+    settings.PERFORMANCE_SAMPLE_RATE = 0
+
+
+def performance_records(caplog):
+    return [json.loads(record.getMessage()) for record in caplog.records
+            if record.name == "blogicum.performance"]
+
+
+def test_server_timing_header(metrics_on, user_client,
+                              post_with_published_location, caplog):
+    caplog.set_level(logging.INFO, logger="blogicum.performance")
+    response = user_client.get(f"/posts/{post_with_published_location.id}/")
+    timing = response["Server-Timing"]
+    assert "sql;dur=" in timing and "tpl;dur=" in timing, (
+        "Убедитесь, что ответ содержит заголовок Server-Timing со временем"
+        " запросов к базе данных и отрисовки шаблонов."
+    )
+    [record] = performance_records(caplog)
+    assert record["view"] == "blog:post_detail"
+    assert record["queries"] > 0 and record["template_ms"] > 0
+    assert record["response_bytes"] == len(response.content)
+    assert record["cache_hits"] + record["cache_misses"] > 0
+    assert "slow_queries" not in record
+
+
+def test_sampled_request_logs_slow_queries(metrics_on, settings, client,
+                                           caplog):
+    settings.PERFORMANCE_SAMPLE_RATE = 1
+    settings.PERFORMANCE_SLOW_QUERIES = 2
+    caplog.set_level(logging.INFO, logger="blogicum.performance")
+    client.get("/")
+    [record] = performance_records(caplog)
+    durations = [query["sql_ms"] for query in record["slow_queries"]]
+    assert len(durations) == min(2, record["queries"])
+    assert durations == sorted(durations, reverse=True)
+
+
+def test_disabled_by_default(client, caplog):
+    caplog.set_level(logging.INFO, logger="blogicum.performance")
+    response = client.get("/")
+    assert "Server-Timing" not in response
+    assert not performance_records(caplog)
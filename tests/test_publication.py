@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+from jobs.models import Job
+from jobs.queue import run_due_jobs
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def deferred_post(mixer, user, published_category):
+    return mixer.blend("blog.Post", author=user,
+                       category=published_category, is_published=True,
+                       pub_date=timezone.now() + timedelta(minutes=5))
+
+
+def index_ids(client):
+    return [post.id for post in client.get("/").context["page_obj"]]
+
+
+def test_feed_filters_static_flag(client, deferred_post):
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/")
+    feed_sql = [query["sql"] for query in queries
+                if 'FROM "blog_post"' in query["sql"]]
+    assert feed_sql and not any(
+        '"blog_post"."pub_date" <=' in sql for sql in feed_sql), (
+        "Убедитесь, что лента фильтрует публикации по флагу видимости, а не"
+        " сравнивает дату публикации с текущим временем."
+    )
+
+
+def test_deferred_post_published_by_job(client, deferred_post):
+    job = Job.objects.get(task="blog.publication.publish_due_posts")
+    assert job.run_at == deferred_post.pub_date, (
+        "Убедитесь, что публикация отложенного поста запланирована на время"
+        " его публикации."
+    )
+    assert deferred_post.id not in index_ids(client)
+
+    Post.objects.filter(pk=deferred_post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1))
+    Job.objects.update(run_at=timezone.now())
+    run_due_jobs()
+    assert Post.objects.get(pk=deferred_post.pk).is_visible
+    assert deferred_post.id in index_ids(client), (
+        "Убедитесь, что опубликованный по расписанию пост сразу появляется в"
+        " ленте, в том числе закэшированной."
+    )
+
+
+def test_resaved_deferred_post_queued_once(deferred_post):
+    for number in range(3):
+        deferred_post.title = f"Заголовок {number}"
+        deferred_post.save()
+    assert Job.objects.filter(
+        task="blog.publication.publish_due_posts").count() == 1, (
+        "Убедитесь, что повторное сохранение отложенной публикации не"
+        " ставит в очередь новые задачи публикации."
+    )
+    deferred_post.pub_date += timedelta(minutes=5)
+    deferred_post.save()
+    assert Job.objects.filter(
+        task="blog.publication.publish_due_posts").count() == 2
+
+
+def test_category_hides_and_shows_posts(client, post_with_published_location):
+    post = post_with_published_location
+    category = post.category
+    assert post.id in index_ids(client)
+    category.is_published = False
+    category.save()
+    assert post.id not in index_ids(client)
+    category.is_published = True
+    category.save()
+    assert post.id in index_ids(client)
+    category.delete()
+    assert not Post.objects.get(pk=post.pk).is_visible, (
+        "Убедитесь, что публикации удалённой категории скрываются из лент."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_publication_reaches_site_cache(client, shared_cache, mixer,
+                                               user, published_category):
+    deferred = mixer.blend("blog.Post", author=user,
+                           category=published_category, is_published=True,
+                           pub_date=timezone.now() + timedelta(minutes=5))
+    link = f"/posts/{deferred.id}/".encode()
+    assert link not in client.get("/").content
+    assert link not in client.get("/rss/").content
+    now = timezone.now()
+    Post.objects.filter(pk=deferred.pk).update(pub_date=now)
+    Job.objects.update(run_at=now)
+    # Pool threads of run_jobs open caches of their own, like another
+    # process would
+    call_command("run_jobs", "--once", "--poll", "0.1", stdout=StringIO())
+    assert link in client.get("/").content, (
+        "Убедитесь, что опубликованная обработчиком задач запись сразу"
+        " появляется на закэшированной главной странице."
+    )
+    assert link in client.get("/rss/").content, (
+        "Убедитесь, что опубликованная обработчиком задач запись сразу"
+        " появляется в закэшированной ленте RSS."
+    )
@@ -0,0 +1,120 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def no_page_cache(settings):
+    settings.MIDDLEWARE = [
+        middleware for middleware in settings.MIDDLEWARE
+        if not middleware.endswith("PageCacheMiddleware")
+    ]
+
+# Queries allowed for one rendered feed page, whatever its size,
+# including the aggregate the ETag and Last-Modified are built from.
+FEED_QUERY_BUDGET = {
+    "/": 2,
+    "/category/{category}/": 4,
+    "/profile/{author}/": 4,
+}
+
+
+@pytest.mark.parametrize("dated_posts", [N_PER_PAGE], indirect=True)
+@pytest.mark.parametrize("url", FEED_QUERY_BUDGET)
+def test_feed_query_budget(client, dated_posts, url):
+    post = dated_posts[0]
+    page_url = url.format(category=post.category.slug,
+                          author=post.author.username)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(page_url)
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+    assert len(queries) <= FEED_QUERY_BUDGET[url], (
+        f"Убедитесь, что страница `{url}` загружает публикации вместе с"
+        " автором, категорией и местоположением, без отдельного запроса на"
+        " каждую публикацию. Выполнено запросов:"
+        f" {len(queries)}, ожидалось не больше {FEED_QUERY_BUDGET[url]}."
+    )
+
+
+def test_feeds_use_indexes():
+    try:
+        call_command("explain_feeds", stdout=StringIO())
+    except CommandError as error:
+        raise AssertionError(
+            "Убедитесь, что ленты публикаций читают таблицу `blog_post` по"
+            f" индексам: {error}"
+        )
+
+
+def test_comments_use_index():
+    plan = (Comment.objects.filter(post=1)
+            .order_by("created_at", "id")[:10].explain())
+    assert "comment_post_created_at_idx" in plan, (
+        "Убедитесь, что комментарии публикации читаются по индексу"
+        f" (post, created_at). План запроса: {plan}"
+    )
+    assert "TEMP B-TREE" not in plan, (
+        "Убедитесь, что комментарии не сортируются отдельно от индекса."
+        f" План запроса: {plan}"
+    )
+
+
+def test_post_detail_query_budget(client, mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(5).blend("blog.Comment", post=post)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/posts/{post.id}/")
+    assert len(response.context["comments"]) == 5
+    assert len(queries) <= 2, (
+        "Убедитесь, что страница публикации получает пост одним запросом, а"
+        " комментарии вместе с их авторами - ещё одним. Выполнено запросов:"
+        f" {len(queries)}."
+    )
+
+
+def count_selects(queries, table):
+    return sum(
+        query["sql"].startswith("SELECT")
+        and f'FROM "{table}"' in query["sql"]
+        for query in queries
+    )
+
+
+@pytest.mark.parametrize(
+    ("url", "table_selects"),
+    [
+        ("/posts/{post}/edit/", {"blog_post": 1}),
+        ("/posts/{post}/delete/", {"blog_post": 1}),
+        ("/posts/{post}/edit_comment/{comment}/",
+         {"blog_post": 1, "blog_comment": 1}),
+        ("/posts/{post}/delete_comment/{comment}/", {"blog_comment": 1}),
+        ("/profile/{author}/", {"auth_user": 2}),
+        ("/category/{category}/", {"blog_category": 1}),
+        ("/posts/{post}/", {"blog_post": 1}),
+    ],
+)
+def test_objects_loaded_once(user_client, comment_to_a_post, url,
+                             table_selects):
+    post = comment_to_a_post.post
+    page_url = url.format(post=post.id, comment=comment_to_a_post.id,
+                          author=post.author.username,
+                          category=post.category.slug)
+    comment_to_a_post.author = post.author
+    comment_to_a_post.save()
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(page_url)
+    assert response.status_code == 200
+    for table, expected in table_selects.items():
+        assert count_selects(queries, table) == expected, (
+            f"Убедитесь, что страница `{url}` загружает объекты из"
+            f" `{table}` один раз за запрос."
+        )
@@ -0,0 +1,63 @@
+import pytest
+from django.test import override_settings
+
+from blog.models import Post
+from blogicum.routers import PrimaryReplicaRouter, set_replica_reads
+
+pytestmark = [pytest.mark.django_db]
+
+REPLICATED = {
+    "default": {"ENGINE": "django.db.backends.sqlite3"},
+    "replica_1": {"ENGINE": "django.db.backends.sqlite3"},
+}
+
+
+@pytest.fixture
+def routed_reads(monkeypatch):
+    """Records where the router sends reads while a view runs"""
+    reads = []
+    db_for_read = PrimaryReplicaRouter.db_for_read
+
+    def record(self, model, **hints):
+        with override_settings(DATABASES=REPLICATED):
+            alias = db_for_read(self, model, **hints)
+        reads.append(alias)
+        return "default"
+
+    monkeypatch.setattr(PrimaryReplicaRouter, "db_for_read", record)
+    return reads
+
+
+def test_router_defaults_to_primary():
+    router = PrimaryReplicaRouter()
+    with override_settings(DATABASES=REPLICATED):
+        assert router.db_for_read(Post) == "default"
+        set_replica_reads(True)
+        try:
+            assert router.db_for_read(Post) == "replica_1"
+            assert router.db_for_write(Post) == "default"
+        finally:
+            set_replica_reads(False)
+        assert router.db_for_read(Post) == "default"
+
+
+def test_feed_reads_from_replica(client, routed_reads,
+                                 post_with_published_location):
+    client.get(f"/posts/{post_with_published_location.id}/")
+    assert "replica_1" in routed_reads, (
+        "Убедитесь, что страница публикации читает данные с реплики."
+    )
+
+
+def test_reads_pinned_to_primary_after_write(
+        user_client, routed_reads, post_with_published_location):
+    post_id = post_with_published_location.id
+    response = user_client.post(f"/posts/{post_id}/comment/",
+                                {"text": "comment"})
+    assert "pin_primary" in response.cookies
+    routed_reads.clear()
+    user_client.get(f"/posts/{post_id}/")
+    assert routed_reads and set(routed_reads) == {"default"}, (
+        "Убедитесь, что сразу после записи пользователь читает данные с"
+        " основной базы."
+    )
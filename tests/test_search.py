@@ -0,0 +1,104 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+from jobs.queue import run_due_jobs
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def blend_post(mixer, user, published_category, published_location):
+    def blend(**kwargs):
+        kwargs.setdefault("pub_date", timezone.now() - timedelta(days=1))
+        return mixer.blend("blog.Post", author=user,
+                           category=published_category,
+                           location=published_location, **kwargs)
+    return blend
+
+
+def found_ids(client, query):
+    run_due_jobs()
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == HTTPStatus.OK
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_title_text_and_comments(client, mixer, blend_post):
+    by_title = blend_post(title="Горная тропа", text="Описание")
+    by_text = blend_post(title="Поход", text="Шли по горной тропе")
+    commented = blend_post(title="Другое", text="Другое")
+    mixer.blend("blog.Comment", post=commented, text="Тропа размыта")
+    blend_post(title="Море", text="Пляж")
+    assert found_ids(client, "тропа") == [by_title.id, commented.id], (
+        "Убедитесь, что поиск находит публикации по заголовку, тексту и"
+        " комментариям и ставит совпадения в заголовке выше."
+    )
+    assert found_ids(client, "горн") == [by_title.id, by_text.id]
+
+
+def test_search_respects_visibility(client, blend_post):
+    blend_post(title="Тайна", is_published=False)
+    blend_post(title="Тайна", pub_date=timezone.now() + timedelta(days=1))
+    visible = blend_post(title="Тайна")
+    assert found_ids(client, "тайна") == [visible.id], (
+        "Убедитесь, что поиск показывает только опубликованные публикации."
+    )
+
+
+def test_search_index_follows_changes(client, mixer, blend_post):
+    post = blend_post(title="Старое название")
+    post.title = "Новое название"
+    post.save()
+    assert found_ids(client, "старое") == []
+    assert found_ids(client, "новое") == [post.id]
+    comment = mixer.blend("blog.Comment", post=post, text="Отличный вид")
+    assert found_ids(client, "отличный") == [post.id]
+    comment.delete()
+    assert found_ids(client, "отличный") == []
+    post.delete()
+    assert found_ids(client, "новое") == [], (
+        "Убедитесь, что поисковый индекс обновляется при изменении и"
+        " удалении публикаций и комментариев."
+    )
+
+
+@pytest.mark.parametrize("query", ["", "   ", '"*(', "OR AND NEAR"])
+def test_search_odd_queries(client, blend_post, query):
+    blend_post(title="Что-то")
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_search_pagination_keeps_query(client, blend_post):
+    for _ in range(N_PER_PAGE + 1):
+        blend_post(title="Закат")
+    run_due_jobs()
+    content = client.get("/search/", {"q": "закат"}).content.decode("utf-8")
+    assert "q=%D0%B7%D0%B0%D0%BA%D0%B0%D1%82&amp;page=2" in content, (
+        "Убедитесь, что ссылки пагинатора на странице поиска сохраняют"
+        " поисковый запрос."
+    )
+    response = client.get("/search/", {"q": "закат", "page": 2})
+    assert len(response.context["page_obj"]) == 1
+
+
+def test_search_count_follows_comments(client, mixer, blend_post):
+    post = blend_post(title="Поход")
+    run_due_jobs()
+    response = client.get("/search/", {"q": "ливень"})
+    assert response.context["page_obj"].paginator.count == 0
+    comment = mixer.blend("blog.Comment", post=post, text="Попали под ливень")
+    run_due_jobs()
+    response = client.get("/search/", {"q": "ливень"})
+    assert response.context["page_obj"].paginator.count == 1, (
+        "Убедитесь, что число найденных публикаций пересчитывается после"
+        " добавления комментария."
+    )
+    comment.delete()
+    run_due_jobs()
+    response = client.get("/search/", {"q": "ливень"})
+    assert response.context["page_obj"].paginator.count == 0
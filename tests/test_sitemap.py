@@ -0,0 +1,131 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+from blog.sitemaps import rebuild_sitemap, update_sitemap
+from jobs.queue import run_due_jobs
+
+pytestmark = [pytest.mark.django_db]
+
+User = get_user_model()
+
+LOC = re.compile(r"<loc>http://testserver(/[^<]*)</loc>")
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    now = timezone.now()
+    return mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+        pub_date=(now - timedelta(hours=hours) for hours in range(1, 10)))
+
+
+def sitemap_urls(client):
+    """Paths listed by all the files of the sitemap index"""
+    run_due_jobs()
+    index = client.get("/sitemap.xml")
+    assert index.status_code == 200
+    urls = []
+    for path in LOC.findall(index.content.decode()):
+        content = client.get(path).content.decode()
+        assert content.count("<lastmod>") == content.count("<loc>"), (
+            "Убедитесь, что у каждого адреса карты сайта указан lastmod."
+        )
+        urls += LOC.findall(content)
+    return urls
+
+
+def test_sitemap_lists_public_pages(client, posts, mixer, user):
+    hidden = mixer.blend("blog.Post", author=user, category=posts[0].category,
+                         is_published=False)
+    urls = sitemap_urls(client)
+    assert sorted(urls) == sorted(
+        [f"/posts/{post.id}/" for post in posts]
+        + [f"/category/{posts[0].category.slug}/",
+           f"/profile/{user.username}/"]), (
+        "Убедитесь, что карта сайта содержит опубликованные записи, их"
+        " категории и авторов."
+    )
+    assert f"/posts/{hidden.id}/" not in urls
+
+
+def test_sitemap_sharded(client, posts, settings):
+    settings.SITEMAP_SHARD_SIZE = 2
+    call_command("rebuild_sitemap")
+    index = LOC.findall(client.get("/sitemap.xml").content.decode())
+    post_files = [path for path in index if "posts" in path]
+    assert len(post_files) > 1, (
+        "Убедитесь, что карта сайта разбивается на файлы не больше"
+        " SITEMAP_SHARD_SIZE адресов."
+    )
+    for path in post_files:
+        assert len(LOC.findall(client.get(path).content.decode())) <= 2
+    assert len(sitemap_urls(client)) == len(posts) + 2
+
+
+def test_sitemap_updated_incrementally(client, posts):
+    sitemap_urls(client)
+    posts[0].is_published = False
+    posts[0].save()
+    category = posts[1].category
+    assert f"/posts/{posts[0].id}/" not in sitemap_urls(client), (
+        "Убедитесь, что снятая с публикации запись пропадает из карты сайта."
+    )
+    category.is_published = False
+    category.save()
+    assert sitemap_urls(client) == [], (
+        "Убедитесь, что при снятии категории с публикации из карты сайта"
+        " пропадают она, её записи и авторы без других публикаций."
+    )
+
+
+def test_sitemap_served_from_cache(client, posts):
+    run_due_jobs()
+    first = client.get("/sitemap.xml")
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get("/sitemap.xml")
+        not_modified = client.get("/sitemap.xml",
+                                  HTTP_IF_NONE_MATCH=first["ETag"])
+    assert second.content == first.content and len(queries) == 2, (
+        "Убедитесь, что карта сайта отдаётся из кэша, сверяя с базой данных"
+        " только версию карты сайта."
+    )
+    assert not_modified.status_code == 304
+
+
+def test_sitemap_follows_table_not_cache(client, posts, user):
+    """Entries written by a worker with its own cache show up at once"""
+    run_due_jobs()
+    etag = client.get("/sitemap.xml")["ETag"]
+    # As run by the worker: update() sends no signals to the site cache
+    Post.objects.filter(author=user).update(is_visible=False)
+    update_sitemap(post_ids=[post.id for post in posts], user_ids=[user.pk])
+    response = client.get("/sitemap.xml", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert b"sitemap-profiles" not in response.content, (
+        "Убедитесь, что карта сайта следует за версией в базе данных, а не"
+        " за ключом кэша, который обработчик задач может не увидеть."
+    )
+
+
+def test_sitemap_version_follows_rebuild(client, posts, user):
+    """Same number of URLs and lastmod, another location"""
+    run_due_jobs()
+    path = [path for path in LOC.findall(
+        client.get("/sitemap.xml").content.decode()) if "profiles" in path][0]
+    etag = client.get(path)["ETag"]
+    User.objects.filter(pk=user.pk).update(username="renamed")
+    rebuild_sitemap()
+    response = client.get(path, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and b"/profile/renamed/" in (
+        response.content), (
+        "Убедитесь, что после перестроения карты сайта меняется её ETag."
+    )
@@ -0,0 +1,34 @@
+import re
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def normalized(content):
+    return re.sub(r"\s+", " ", content.decode("utf-8"))
+
+
+@pytest.mark.parametrize("url", ["/", "/?page=2", "/profile/{author}/"])
+def test_streamed_page_matches_rendered(user_client, settings, dated_posts,
+                                        url):
+    url = url.format(author=dated_posts[0].author.username)
+    rendered = user_client.get(url)
+    settings.STREAM_FEED_PAGES = True
+    streamed = user_client.get(url)
+    assert streamed.streaming, (
+        f"Убедитесь, что при включённом STREAM_FEED_PAGES страница `{url}`"
+        " отдаётся потоком."
+    )
+    chunks = list(streamed.streaming_content)
+    assert b"<header>" in chunks[0] and b"card-title" not in chunks[0], (
+        "Убедитесь, что шапка страницы отправляется до карточек публикаций."
+    )
+    assert normalized(b"".join(chunks)) == normalized(rendered.content)
+    assert streamed["ETag"] == rendered["ETag"]
+
+
+def test_streamed_page_revalidates(user_client, settings, dated_posts):
+    settings.STREAM_FEED_PAGES = True
+    etag = user_client.get("/")["ETag"]
+    assert user_client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 304